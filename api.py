@@ -0,0 +1,272 @@
+"""API HTTP (JSON, só leitura) sobre a camada de consultas, com um pool de threads
+
+Uso autónomo:
+    python api.py --port 8600 --workers 8
+
+Dentro do processo do Streamlit (mesmas caches e índices da app), basta definir
+FOOTDATA_API_PORT antes de arrancar a app.
+
+Endpoints (GET):
+    /health                                   versão e tamanho do dataset
+    /clubs                                    resumo de todos os clubes
+    /clubs/<clube>                            resumo de um clube
+    /head-to-head?left=<clube>&right=<clube>  comparação entre dois clubes
+    /compare?club=<a>&club=<b>&club=<c>       comparação de N clubes (métricas e histogramas)
+    /lineup?club=<clube>&formation=4-3-3      onze inicial
+    /position-strength?club=<a>&club=<b>      Overall médio por posição
+    /position-ranking?club=<clube>            ranking do clube na liga em cada posição
+    /position-leaders?position=CB&n=10        clubes mais fortes numa posição
+    /scouting?min_overall=75&max_age=28&position=ST&exclude=<clube>&page=0&page_size=10 (máx. 200)
+"""
+import argparse
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+import streamlit as st
+import queries
+from utils import dataset_version
+
+API_PORT = os.environ.get("FOOTDATA_API_PORT")
+API_HOST = os.environ.get("FOOTDATA_API_HOST", "127.0.0.1")
+API_WORKERS = int(os.environ.get("FOOTDATA_API_WORKERS", "8"))
+# Maior página aceite em /scouting (evita respostas com o dataset inteiro)
+MAX_PAGE_SIZE = 200
+
+logger = logging.getLogger(__name__)
+
+def _records(frame):
+    # to_json trata dos tipos numpy/pyarrow, categorias e NaN (null)
+    return json.loads(frame.to_json(orient='records', force_ascii=False))
+
+def _object(series):
+    return json.loads(series.to_json(force_ascii=False))
+
+def _club_frame(summary):
+    return summary.drop(columns='label').rename_axis('club').reset_index()
+
+def _number(params, name, cast=float):
+    value = params.get(name, [None])[0]
+    if value in (None, ''):
+        return None
+    try:
+        return cast(value)
+    except ValueError:
+        raise ValueError(f"Parâmetro inválido: {name}={value}")
+
+def _required(params, name):
+    value = params.get(name, [None])[0]
+    if not value:
+        raise ValueError(f"Parâmetro em falta: {name}")
+    return value
+
+def _page_size(params):
+    page_size = _number(params, 'page_size', int) or queries.PAGE_SIZE
+    if page_size > MAX_PAGE_SIZE:
+        raise ValueError(f"Parâmetro inválido: page_size={page_size} (máximo {MAX_PAGE_SIZE})")
+    return page_size
+
+def health(df, params):
+    return {'version': dataset_version(df), 'players': len(df), 'clubs': len(queries.list_clubs(df))}
+
+def clubs(df, params):
+    return _records(_club_frame(queries.list_clubs(df)))
+
+def club(df, params, name):
+    return {'club': name, **_object(queries.club_summary(df, name).drop('label'))}
+
+def head_to_head(df, params):
+    left, right = _required(params, 'left'), _required(params, 'right')
+    result = queries.head_to_head(df, left, right)
+    return {
+        'left': {'club': left, **_object(result.left.drop('label'))},
+        'right': {'club': right, **_object(result.right.drop('label'))},
+        'difference': _object(result.difference),
+    }
+
+def compare(df, params):
+    names = params.get('club', [])
+    if not names:
+        raise ValueError("Parâmetro em falta: club")
+    result = queries.compare_clubs(df, names)
+    return {
+        'metrics': _records(result.metrics.rename_axis('club').reset_index()),
+        'deltas': _records(result.deltas.rename_axis('club').reset_index()),
+        'overall_bins': result.overall_distribution.index.tolist(),
+        'overall_distribution': {name: result.overall_distribution[name].tolist() for name in result.metrics.index},
+        'age_bins': result.age_distribution.index.tolist(),
+        'age_distribution': {name: result.age_distribution[name].tolist() for name in result.metrics.index},
+    }
+
+def lineup(df, params):
+    club_name = _required(params, 'club')
+    formation = params.get('formation', [queries.DEFAULT_FORMATION])[0]
+    xi = queries.starting_xi(df, club_name, formation)
+    return {'club': club_name, 'formation': formation,
+            'players': _records(queries.player_columns(xi, extra=('slot_role', 'slot_x', 'slot_y')))}
+
+def position_strength(df, params):
+    names = list(dict.fromkeys(params.get('club', [])))
+    if not names:
+        raise ValueError("Parâmetro em falta: club")
+    strength = queries.position_strength(df, names)
+    return {'positions': [str(position) for position in strength.index],
+            'clubs': {name: strength[name].tolist() for name in names}}
+
+def position_ranking(df, params):
+    club_name = _required(params, 'club')
+    ranking = queries.position_ranking(df, club_name)
+    return {'club': club_name, 'positions': _records(ranking.rename_axis('position').reset_index())}
+
+def position_leaders(df, params):
+    position = _required(params, 'position')
+    n = _number(params, 'n', int)
+    leaders = queries.position_leaders(df, position, 10 if n is None else n)
+    return {'position': position, 'clubs': _records(leaders.rename_axis('club').reset_index())}
+
+def scouting(df, params):
+    position = params.get('position', [None])[0] or None
+    result = queries.scouting_search(
+        df,
+        min_overall=_number(params, 'min_overall') or 0,
+        min_potential=_number(params, 'min_potential'),
+        max_age=_number(params, 'max_age'),
+        max_value=_number(params, 'max_value'),
+        position=position,
+        exclude_clubs=params.get('exclude', []),
+        page=_number(params, 'page', int) or 0,
+        page_size=_page_size(params)
+    )
+    return {'total': result.total, 'page': result.page, 'elapsed_ms': result.elapsed_ms,
+            'players': _records(queries.player_columns(result.players))}
+
+ROUTES = {
+    '/health': health,
+    '/clubs': clubs,
+    '/head-to-head': head_to_head,
+    '/compare': compare,
+    '/lineup': lineup,
+    '/position-strength': position_strength,
+    '/position-ranking': position_ranking,
+    '/position-leaders': position_leaders,
+    '/scouting': scouting,
+}
+
+def route(df, path, params):
+    """Resposta (dicionário ou lista) para um caminho; KeyError se o recurso não existir"""
+    if path.startswith('/clubs/'):
+        return club(df, params, unquote(path[len('/clubs/'):]))
+    handler = ROUTES.get(path.rstrip('/') or '/')
+    if handler is None:
+        raise KeyError(f"Endpoint desconhecido: {path}")
+    return handler(df, params)
+
+class QueryHandler(BaseHTTPRequestHandler):
+    """Pedidos GET respondidos em JSON a partir do snapshot atual do dataset"""
+    server_version = "FootDataAPI/1.0"
+    # HTTP/1.0: a ligação fecha depois de cada resposta, para uma ligação parada (keep-alive)
+    # não ocupar uma thread do pool; um cliente que não envia o pedido liberta-a ao fim de `timeout`
+    timeout = 10
+    # Cabeçalhos e corpo seguem em escritas separadas: sem Nagle não esperam pelo ACK atrasado
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        try:
+            payload = route(self.server.dataset(), url.path, parse_qs(url.query))
+            status = 200
+        except KeyError as error:
+            payload, status = {'error': str(error.args[0]) if error.args else 'não encontrado'}, 404
+        except ValueError as error:
+            payload, status = {'error': str(error)}, 400
+        except Exception:
+            logger.exception("Erro a responder a %s", self.path)
+            payload, status = {'error': 'erro interno'}, 500
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+class PooledHTTPServer(HTTPServer):
+    """Servidor HTTP em que cada ligação (um pedido) é atendida por um pool fixo de threads"""
+    daemon_threads = True
+    # Com uma ligação por pedido, a fila de ligações à espera de accept tem de ser maior que a omissão (5)
+    request_queue_size = 128
+
+    def __init__(self, address, dataset, workers=API_WORKERS):
+        # O pool existe antes do bind: se este falhar, server_close já o pode encerrar
+        self.dataset = dataset
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="api-worker")
+        super().__init__(address, QueryHandler)
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self._process, request, client_address)
+
+    def _process(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=False)
+
+def make_server(host=API_HOST, port=0, dataset=None, workers=API_WORKERS):
+    """Cria o servidor; `dataset` é uma função que devolve o snapshot atual (por omissão, o da app)"""
+    if dataset is None:
+        # Sem a instrumentação de current_dataset: um pedido à API não é uma execução do script
+        from live_data import dataset_snapshot
+        dataset = dataset_snapshot
+    return PooledHTTPServer((host, port), dataset, workers)
+
+def serve_in_background(server):
+    """Atende pedidos numa thread daemon; devolve a thread"""
+    thread = threading.Thread(target=server.serve_forever, name="api-server", daemon=True)
+    thread.start()
+    return thread
+
+@st.cache_resource
+def start_embedded_api():
+    """Arranca (uma vez por processo) a API dentro da app, se FOOTDATA_API_PORT estiver definido"""
+    if not API_PORT:
+        return None
+    try:
+        server = make_server(API_HOST, int(API_PORT))
+    except OSError:
+        # Porta ocupada (ex.: servidor anterior ainda ativo após recarregar o módulo): a app continua sem API
+        logger.exception("Não foi possível arrancar a API em %s:%s", API_HOST, API_PORT)
+        return None
+    serve_in_background(server)
+    logger.info("API a ouvir em http://%s:%s", *server.server_address[:2])
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default=API_HOST)
+    parser.add_argument('--port', type=int, default=int(API_PORT or 8600))
+    parser.add_argument('--workers', type=int, default=API_WORKERS)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    server = make_server(args.host, args.port, workers=args.workers)
+    print(f"A ouvir em http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
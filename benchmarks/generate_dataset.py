@@ -0,0 +1,92 @@
+"""Gera ficheiros players.csv sintéticos com o mesmo esquema que load_data espera
+
+Uso:
+    python benchmarks/generate_dataset.py --rows 100000 --out benchmarks/data/players_100000.csv
+"""
+import argparse
+import os
+import numpy as np
+import pandas as pd
+
+POSITIONS = ["GK", "CB", "LB", "RB", "LWB", "RWB", "CDM", "CM", "CAM", "LM", "RM", "LW", "RW", "CF", "ST"]
+POSITION_WEIGHTS = [8, 14, 6, 6, 2, 2, 7, 10, 6, 5, 5, 4, 4, 3, 12]
+NATIONALITIES = ["Portugal", "Spain", "Brazil", "Argentina", "France", "Germany", "England", "Italy",
+                 "Netherlands", "Belgium", "Uruguay", "Colombia", "Nigeria", "Japan", "Mexico"]
+FIRST_NAMES = ["João", "Luis", "Carlos", "Bruno", "André", "Diego", "Marco", "Pedro", "Rafael", "Tiago",
+               "Lucas", "Mateo", "Kevin", "Paul", "Jan", "Hugo", "Ivan", "Sergio", "Nuno", "Rúben"]
+LAST_NAMES = ["Silva", "Santos", "Fernandes", "Pereira", "Costa", "García", "Martínez", "Müller", "Smith",
+              "Rossi", "Dubois", "Jansen", "Novak", "Okafor", "Tanaka", "López", "Moreira", "Neves"]
+
+# Jogadores por clube (~18k jogadores em ~700 clubes no dataset FIFA original)
+PLAYERS_PER_CLUB = 26
+
+def money(values_eur):
+    """Formata valores em euros no formato do dataset (€91M, €575K, €0)"""
+    values_eur = np.asarray(values_eur, dtype='float64')
+    millions = pd.Series(values_eur / 1e6).round(1).astype(str).str.removesuffix('.0')
+    thousands = pd.Series(values_eur / 1e3).round(0).astype('int64').astype(str)
+    out = np.where(values_eur >= 1e6, "€" + millions + "M",
+                   np.where(values_eur >= 1e3, "€" + thousands + "K", "€0"))
+    return out
+
+def generate_players(rows, seed=42, invalid_fraction=0.01):
+    """DataFrame sintético com o esquema do players.csv (inclui uma pequena fração de linhas inválidas)"""
+    rng = np.random.default_rng(seed)
+    n_clubs = max(2, rows // PLAYERS_PER_CLUB)
+    club_ids = rng.integers(0, n_clubs, rows)
+    club_strength = rng.normal(68, 6, n_clubs)
+
+    overall = np.clip(np.round(club_strength[club_ids] + rng.normal(0, 5, rows)), 40, 94).astype('int64')
+    age = np.clip(np.round(rng.gamma(9, 2.8, rows)), 16, 42).astype('int64')
+    potential = np.maximum(overall, overall + np.clip(np.round((27 - age) * rng.uniform(0.5, 1.5, rows)), 0, 25)).astype('int64')
+    value = np.round(np.exp((overall - 40) / 6.5) * 12_000 * rng.uniform(0.6, 1.4, rows) * np.where(age > 32, 0.3, 1.0), -3)
+    wage = np.round(value / 220, -3)
+    ids = rng.permutation(np.arange(10_000, 10_000 + rows * 3))[:rows]
+    positions = rng.choice(POSITIONS, rows, p=np.array(POSITION_WEIGHTS) / sum(POSITION_WEIGHTS))
+
+    id_str = pd.Series(ids).astype(str)
+    club_str = pd.Series(club_ids).astype(str)
+    df = pd.DataFrame({
+        'ID': ids,
+        'Name': pd.Series(rng.choice(FIRST_NAMES, rows)) + " " + pd.Series(rng.choice(LAST_NAMES, rows)),
+        'Age': age,
+        'Photo': "https://cdn.sofifa.net/players/" + id_str.str[:3] + "/" + id_str.str[3:] + "/24_120.png",
+        'Nationality': rng.choice(NATIONALITIES, rows),
+        'Overall': overall,
+        'Potential': potential,
+        'Club': "FC Synthetic " + club_str,
+        'Club Logo': "https://cdn.sofifa.net/teams/" + club_str + "/60.png",
+        'Value': money(value),
+        'Wage': money(wage),
+        'Preferred Foot': rng.choice(["Right", "Left"], rows, p=[0.77, 0.23]),
+        'International Reputation': np.clip(np.round((overall - 60) / 8), 1, 5).astype('int64'),
+        'Position': '<span class="pos">' + pd.Series(positions) + '</span>',
+    })
+    for stat in ['Pace', 'Shooting', 'Passing', 'Dribbling', 'Defending', 'Physical']:
+        df[stat] = np.clip(np.round(overall + rng.normal(0, 9, rows)), 20, 99).astype('int64')
+
+    # Linhas inválidas que filter_valid_players deve remover
+    n_invalid = int(rows * invalid_fraction)
+    if n_invalid:
+        df = df.astype({'Club': 'object', 'Position': 'object', 'Overall': 'object'})
+        invalid = rng.choice(rows, n_invalid, replace=False)
+        third = n_invalid // 3
+        df.loc[invalid[:third], 'Club'] = None
+        df.loc[invalid[third:2 * third], 'Overall'] = 0
+        df.loc[invalid[2 * third:], 'Position'] = None
+    return df
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=10_000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--out', default=None, help="caminho do CSV (por omissão benchmarks/data/players_<rows>.csv)")
+    args = parser.parse_args()
+
+    out = args.out or os.path.join(os.path.dirname(__file__), 'data', f'players_{args.rows}.csv')
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    generate_players(args.rows, seed=args.seed).to_csv(out, index=False)
+    print(out)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Custo de arranque da app medido com `python -X importtime`, comparado com uma referência
+
+Uso:
+    python benchmarks/import_time.py                    # compara com benchmarks/import_baseline.json
+    python benchmarks/import_time.py --update-baseline  # grava a medição atual como referência
+
+Importa main.py num processo novo (--repeat vezes, fica o mínimo) e separa o tempo
+das dependências que o Streamlit já tem carregadas do tempo próprio da app. Falha
+se este exceder a referência em mais de --max-regression, ou se algum módulo de
+DEFERRED_MODULES for carregado no arranque (só as páginas que os usam os importam).
+"""
+import argparse
+import datetime
+import json
+import os
+import re
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.run_benchmarks import git_commit
+
+BASELINE_PATH = os.path.join(ROOT, 'benchmarks', 'import_baseline.json')
+
+# Módulos pesados que não podem entrar no caminho de arranque
+DEFERRED_MODULES = ['plotly.express', 'plotly.graph_objs._figure', 'requests', 'PIL.Image']
+
+# Dependências que o processo do Streamlit já tem carregadas antes de correr o script
+PRELOADED_MODULES = ['streamlit', 'pandas', 'numpy', 'pyarrow']
+
+IMPORT_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+def import_profile(module='main'):
+    """Tempo cumulativo (µs) e módulo pai de cada módulo importado ao importar `module` num processo novo"""
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT, capture_output=True, text=True,
+        env={**os.environ, 'PYTHONPATH': ROOT, 'PYTHONDONTWRITEBYTECODE': '1'}
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"Falha a importar {module}:\n{completed.stderr[-2000:]}")
+    # As linhas vêm em pós-ordem: os filhos (mais indentados) antes do módulo que os importou
+    profile, parents, stack = {}, {}, []
+    for line in completed.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if not match:
+            continue
+        depth, name = len(match.group(3)), match.group(4)
+        while stack and stack[-1][0] > depth:
+            parents[stack.pop()[1]] = name
+        stack.append((depth, name))
+        profile[name] = int(match.group(2))
+    return profile, parents
+
+def _ancestors(name, parents):
+    while name in parents:
+        name = parents[name]
+        yield name
+
+def measure(module='main', repeat=5):
+    """Mínimo de `repeat` perfis: total, parte da app (sem as dependências pré-carregadas) e módulos adiados"""
+    runs = [import_profile(module) for _ in range(repeat)]
+    best, parents = min(runs, key=lambda run: run[0][module])
+    # Só conta cada dependência pré-carregada uma vez (não as que outra já importou)
+    preloaded = sum(best[name] for name in PRELOADED_MODULES
+                    if name in best and not set(_ancestors(name, parents)) & set(PRELOADED_MODULES))
+    return {
+        'total_ms': best[module] / 1000,
+        'app_ms': (best[module] - preloaded) / 1000,
+        'preloaded_ms': {name: best.get(name, 0) / 1000 for name in PRELOADED_MODULES},
+        'deferred_loaded': [name for name in DEFERRED_MODULES if name in best],
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--module', default='main')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--max-regression', type=float, default=0.25,
+                        help="falha se o tempo da app exceder a referência nesta fração")
+    parser.add_argument('--update-baseline', action='store_true')
+    args = parser.parse_args()
+
+    result = measure(args.module, args.repeat)
+    print(f"import {args.module}: {result['total_ms']:.1f} ms no total, {result['app_ms']:.1f} ms da app "
+          f"(sem {', '.join(PRELOADED_MODULES)})")
+
+    if args.update_baseline:
+        report = {
+            'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'commit': git_commit(),
+            'python': sys.version.split()[0],
+            **result,
+        }
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(args.baseline)
+        return
+
+    failures = [f"{name} carregado no arranque" for name in result['deferred_loaded']]
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        limit = baseline['app_ms'] * (1 + args.max_regression)
+        print(f"referência: {baseline['app_ms']:.1f} ms da app (limite {limit:.1f} ms)")
+        if result['app_ms'] > limit:
+            failures.append(f"arranque da app em {result['app_ms']:.1f} ms, acima de {limit:.1f} ms")
+    else:
+        print(f"sem referência em {args.baseline} (use --update-baseline)")
+
+    if failures:
+        for failure in failures:
+            print(f"ERRO: {failure}", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
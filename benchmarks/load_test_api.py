@@ -0,0 +1,146 @@
+"""Teste de carga local da API JSON (servidor e clientes no mesmo processo)
+
+Uso:
+    python benchmarks/load_test_api.py --rows 100000 --clients 16 --requests 2000 --output benchmarks/results_api.json
+
+Arranca a API sobre um dataset sintético, aquece as caches e dispara pedidos
+concorrentes a todos os endpoints, medindo débito e latências (p50/p95/p99).
+Falha se algum endpoint tiver p99 acima de --max-p99-ms (por omissão MAX_P99_MS;
+0 desliga) ou, com --max-p95-ms, p95 acima desse valor.
+"""
+import argparse
+import datetime
+import json
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+import requests
+from api import make_server, serve_in_background
+from benchmarks.run_benchmarks import dataset_path, git_commit
+from live_data import LiveDataset, warm_derived_caches
+from utils import get_club_summary, list_positions
+
+# Latência p99 máxima aceite por omissão, em ms (com 16 clientes e 8 workers o p99 fica abaixo de 600 ms;
+# ligações que prendem threads do pool levam-no a vários segundos)
+MAX_P99_MS = 1000
+
+def build_requests(df, count, seed=0):
+    """Lista de (endpoint, caminho) com a mistura de pedidos do teste"""
+    rng = random.Random(seed)
+    clubs = get_club_summary(df).index.tolist()
+    positions = list_positions(df)
+
+    def club():
+        return quote(rng.choice(clubs))
+
+    makers = [
+        ('clubs', lambda: "/clubs"),
+        ('club', lambda: f"/clubs/{club()}"),
+        ('head-to-head', lambda: f"/head-to-head?left={club()}&right={club()}"),
+        ('compare', lambda: "/compare?" + "&".join(f"club={club()}" for _ in range(rng.randint(2, 20)))),
+        ('lineup', lambda: f"/lineup?club={club()}&formation={rng.choice(['4-3-3', '4-4-2', '4-2-3-1', '3-5-2'])}"),
+        ('position-strength', lambda: f"/position-strength?club={club()}&club={club()}"),
+        ('position-ranking', lambda: f"/position-ranking?club={club()}"),
+        ('position-leaders', lambda: f"/position-leaders?position={rng.choice(positions)}"),
+        ('scouting', lambda: f"/scouting?min_overall={rng.randint(60, 85)}&max_age={rng.randint(20, 35)}"
+                             f"&position={rng.choice(positions)}&exclude={club()}&page={rng.randint(0, 2)}"),
+    ]
+    return [rng.choice(makers) for _ in range(count)]
+
+def run_load(base_url, plan, clients):
+    """Executa o plano com `clients` clientes concorrentes; devolve (latências por endpoint, erros, duração)"""
+    # Uma sessão por cliente (a API fecha a ligação depois de cada resposta)
+    local = threading.local()
+
+    def call(item):
+        name, make_path = item
+        if not hasattr(local, 'session'):
+            local.session = requests.Session()
+        session = local.session
+        start = time.perf_counter()
+        response = session.get(base_url + make_path(), timeout=30)
+        return name, time.perf_counter() - start, response.status_code
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        results = list(pool.map(call, plan))
+    duration = time.perf_counter() - start
+
+    latencies = {}
+    errors = 0
+    for name, elapsed, status in results:
+        latencies.setdefault(name, []).append(elapsed)
+        errors += status >= 500
+    return latencies, errors, duration
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--max-p95-ms', type=float, default=None)
+    parser.add_argument('--max-p99-ms', type=float, default=MAX_P99_MS)
+    parser.add_argument('--output', default=os.path.join(ROOT, 'benchmarks', 'results_api.json'))
+    args = parser.parse_args()
+
+    live = LiveDataset(dataset_path(args.rows))
+    warm_derived_caches(live.current)
+    server = make_server('127.0.0.1', 0, dataset=lambda: live.current, workers=args.workers)
+    serve_in_background(server)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    plan = build_requests(live.current, args.requests)
+    # Aquecimento: figuras e onzes por clube entram nas caches partilhadas
+    run_load(base_url, plan[:200], args.clients)
+    latencies, errors, duration = run_load(base_url, plan, args.clients)
+    server.shutdown()
+    server.server_close()
+
+    report = {
+        'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'commit': git_commit(),
+        'rows': args.rows,
+        'clients': args.clients,
+        'workers': args.workers,
+        'requests': len(plan),
+        'errors': int(errors),
+        'throughput_rps': len(plan) / duration,
+        'endpoints': {
+            name: {
+                'count': len(times),
+                'p50_ms': float(np.percentile(times, 50) * 1000),
+                'p95_ms': float(np.percentile(times, 95) * 1000),
+                'p99_ms': float(np.percentile(times, 99) * 1000),
+            }
+            for name, times in sorted(latencies.items())
+        },
+    }
+    print(f"{report['requests']} pedidos, {args.clients} clientes, {args.workers} workers: "
+          f"{report['throughput_rps']:.0f} pedidos/s, {report['errors']} erros")
+    for name, stats in report['endpoints'].items():
+        print(f"  {name:<18} p50 {stats['p50_ms']:7.2f} ms  p95 {stats['p95_ms']:7.2f} ms  p99 {stats['p99_ms']:7.2f} ms")
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(args.output)
+
+    slow = [(name, percentile, limit) for name, stats in report['endpoints'].items()
+            for percentile, limit in (('p95', args.max_p95_ms), ('p99', args.max_p99_ms))
+            if limit and stats[f'{percentile}_ms'] > limit]
+    if errors or slow:
+        for name, percentile, limit in slow:
+            print(f"ERRO: {name} com {percentile} acima de {limit} ms", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
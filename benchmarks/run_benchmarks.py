@@ -0,0 +1,249 @@
+"""Benchmarks dos caminhos de carregamento e análise, com resultados em JSON
+
+Uso:
+    python benchmarks/run_benchmarks.py --sizes 10000 100000 1000000 --output benchmarks/results.json
+
+Os datasets sintéticos são gerados (e reutilizados) em benchmarks/data/.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+import pandas as pd
+from benchmarks.generate_dataset import generate_players
+from cards import _build_fragments, player_cards_html
+from club_distributions import ClubDistributions
+from data_cache import load_cached_dataset
+from live_data import LiveDataset, warm_derived_caches
+from match_simulator import _team_ratings, simulate_league, simulate_match
+from position_strength import PositionStrength
+from lineup import DEFAULT_FORMATION, precompute_lineups, solve_all_lineups
+from scouting import ScoutingIndex
+from transfers import TransferSandbox
+from utils import (READ_CHUNK_ROWS, read_players_csv, filter_valid_players, _build_club_summary,
+                   _build_football_field, _build_club_index, _read_csv, _summarize_clubs, memory_report)
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+DATA_DIR = os.path.join(ROOT, 'benchmarks', 'data')
+# Clubes do campeonato simulado no benchmark: o custo cresce com o quadrado do número de clubes,
+# por isso usa-se sempre o mesmo subconjunto, qualquer que seja o tamanho do dataset
+LEAGUE_CLUBS = 20
+
+def measure(func, repeat):
+    """Executa func `repeat` vezes e devolve os tempos (s) e o último resultado"""
+    times = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return times, result
+
+def peak_memory_mb(func):
+    """Pico de memória (MB) alocada durante uma chamada a func"""
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1] / 1e6
+    finally:
+        tracemalloc.stop()
+
+def object_table(df):
+    """O mesmo dataset com textos como objetos Python e números em float64 (representação sem esquema)"""
+    return df.astype({column: 'float64' if pd.api.types.is_numeric_dtype(df[column]) else object
+                      for column in df.columns})
+
+def dataset_path(rows):
+    path = os.path.join(DATA_DIR, f'players_{rows}.csv')
+    if not os.path.exists(path):
+        os.makedirs(DATA_DIR, exist_ok=True)
+        generate_players(rows).to_csv(path, index=False)
+    return path
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def benchmark_size(rows, repeat):
+    """Mede todos os caminhos para um dataset com `rows` linhas"""
+    csv_path = dataset_path(rows)
+    results = {}
+
+    def record(name, func, n=repeat):
+        times, result = measure(func, n)
+        results[name] = {
+            'min_s': min(times),
+            'median_s': float(np.median(times)),
+            'repeat': n,
+        }
+        return result
+
+    record('read_csv', lambda: pd.read_csv(csv_path))
+    raw = record('read_csv_schema', lambda: _read_csv(csv_path))
+    record('filter_valid_players', lambda: filter_valid_players(raw.copy()))
+    record('read_players_full', lambda: read_players_csv(csv_path, chunksize=0), n=1)
+    record('read_players_chunked', lambda: read_players_csv(csv_path, chunksize=READ_CHUNK_ROWS), n=1)
+    peak_mb = {
+        'read_csv': peak_memory_mb(lambda: filter_valid_players(pd.read_csv(csv_path))),
+        'read_players_full': peak_memory_mb(lambda: read_players_csv(csv_path, chunksize=0)),
+        'read_players_chunked': peak_memory_mb(lambda: read_players_csv(csv_path, chunksize=READ_CHUNK_ROWS)),
+    }
+
+    # load_data sem cache (parse + limpeza + escrita da cache) e com cache binária
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_csv = os.path.join(tmp, 'players.csv')
+        os.symlink(csv_path, tmp_csv)
+
+        def cold_load():
+            for path in (os.path.join(tmp, 'players.feather'), os.path.join(tmp, 'players.cache.json')):
+                if os.path.exists(path):
+                    os.remove(path)
+            return load_cached_dataset(tmp_csv, read_players_csv)
+
+        record('load_data_cold', cold_load, n=1)
+        df = record('load_data_warm', lambda: load_cached_dataset(tmp_csv, read_players_csv))
+
+    version = df.attrs['version']
+    record('club_summary', lambda: _build_club_summary.__wrapped__(df, version))
+    record('club_index', lambda: _build_club_index.__wrapped__(df, version))
+
+    record('lineups_all_clubs', lambda: solve_all_lineups(df, DEFAULT_FORMATION), n=1)
+    precompute_lineups(df)
+    biggest_club = df['Club'].value_counts().index[0]
+    record('create_football_field', lambda: _build_football_field.__wrapped__(df, biggest_club, "4-3-3", version))
+
+    # Recarregamento incremental: um jogador atualizado, um removido e um novo
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_csv = os.path.join(tmp, 'players.csv')
+        shutil.copy(csv_path, tmp_csv)
+        live = LiveDataset(tmp_csv)
+        warm_derived_caches(live.current)
+        edited = pd.read_csv(tmp_csv)
+        edited.loc[0, 'Overall'] = 99
+        added = edited.iloc[[2]].assign(ID=edited['ID'].max() + 1)
+        pd.concat([edited.drop(index=1), added]).to_csv(tmp_csv, index=False)
+        record('hot_reload_delta', live.reload, n=1)
+
+    record('position_strength_matrix', lambda: PositionStrength(df))
+    # Referência: o groupby por posição que a interface fazia para cada clube
+    sample_clubs = df['Club'].cat.categories[:20]
+    record('position_groupby_20_clubs', lambda: [
+        df[df['Club'] == club].groupby('position_code', observed=True)['Overall'].mean() for club in sample_clubs
+    ])
+
+    # Comparação de N clubes: histogramas de todos os clubes numa passagem, e o fatiamento por clube original
+    record('club_distributions_build', lambda: ClubDistributions(df))
+    record('club_histograms_20_clubs_slices', lambda: [
+        (df[df['Club'] == club]['Overall'].to_numpy(), df[df['Club'] == club]['Age'].to_numpy())
+        for club in sample_clubs
+    ])
+
+    index = record('scouting_index_build', lambda: ScoutingIndex(df))
+    exclude = df['Club'].iloc[:2].tolist()
+    record('scouting_query', lambda: index.query(min_overall=75, max_age=28, exclude_clubs=exclude))
+    record('scouting_query_position', lambda: index.query(min_overall=70, max_age=30, position='ST',
+                                                         exclude_clubs=exclude))
+    record('scouting_query_page_only', lambda: index.query(min_overall=60, max_age=35, exclude_clubs=exclude,
+                                                          offset=50, count_total=False))
+    # Filtro original (máscara booleana + nlargest) para comparação
+    record('scouting_filter_mask', lambda: df[(df['Overall'] >= 75) & (df['Age'] <= 28)
+                                              & (~df['Club'].isin(exclude))].nlargest(10, 'Overall'))
+
+    # Simulação de jogos: 100k jogos entre dois clubes e um campeonato de LEAGUE_CLUBS clubes
+    # (sem pool, para ser comparável)
+    ratings = record('team_ratings', lambda: _team_ratings(df, DEFAULT_FORMATION))
+    record('match_simulation_100k', lambda: simulate_match(ratings.iloc[0], ratings.iloc[1], 100_000))
+    record(f'league_simulation_{LEAGUE_CLUBS}_clubs',
+           lambda: simulate_league(ratings.iloc[:LEAGUE_CLUBS], workers=1), n=1)
+
+    # Transferências: 50 movimentos encadeados com as métricas dos clubes alterados, e o recálculo completo
+    clubs = df['Club'].cat.categories
+    moves = [(row, clubs[(code + 1) % len(clubs)]) for row, code in
+             zip(range(0, 50 * 7, 7), df['Club'].cat.codes.to_numpy()[:50 * 7:7])]
+
+    def chained_transfers():
+        sandbox = TransferSandbox(df)
+        for row, club in moves:
+            sandbox.move(row, club)
+            sandbox.club_metrics(club)
+        return sandbox
+
+    record('transfer_50_moves', chained_transfers)
+    # Referência: o resumo recalculado sobre uma cópia com um jogador noutro clube (custo de cada movimento)
+    moved_codes = df['Club'].cat.codes.to_numpy().copy()
+    moved_codes[0] = (moved_codes[0] + 1) % len(clubs)
+    record('transfer_full_recompute_per_move', lambda: _summarize_clubs(df.assign(
+        Club=pd.Categorical.from_codes(moved_codes, df['Club'].cat.categories))))
+
+    # Cartões: construção vetorizada de uma página e a mesma lista servida da cache de fragmentos
+    page = df.nlargest(50, 'Overall')
+    record('player_cards_build_50', lambda: _build_fragments(page, "scout", [None] * len(page)))
+    player_cards_html(df, page, "scout")
+    record('player_cards_cached_50', lambda: player_cards_html(df, page, "scout"))
+
+    report = memory_report(df, object_table(df))
+    memory = {
+        'before_bytes': int(report.at['total', 'before']),
+        'after_bytes': int(report.at['total', 'after']),
+        'ratio': float(report.at['total', 'ratio']),
+        'columns': {column: int(report.at[column, 'after']) for column in df.columns},
+    }
+
+    return {'rows': rows, 'clean_rows': len(df), 'clubs': int(df['Club'].nunique()), 'timings': results,
+            'peak_memory_mb': peak_mb, 'memory': memory}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', default=os.path.join(ROOT, 'benchmarks', 'results.json'))
+    parser.add_argument('--max-memory-ratio', type=float, default=0.5,
+                        help="falha se o dataset compacto ocupar mais do que esta fração da representação sem esquema")
+    args = parser.parse_args()
+
+    report = {
+        'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'results': [],
+    }
+    for rows in args.sizes:
+        result = benchmark_size(rows, args.repeat)
+        report['results'].append(result)
+        for name, timing in result['timings'].items():
+            print(f"{rows:>9} {name:<28} {timing['median_s'] * 1000:10.2f} ms")
+        for name, peak in result['peak_memory_mb'].items():
+            print(f"{rows:>9} {'peak ' + name:<28} {peak:10.1f} MB")
+        memory = result['memory']
+        print(f"{rows:>9} {'memory (before -> after)':<28} {memory['before_bytes'] / 1e6:10.1f} MB"
+              f" -> {memory['after_bytes'] / 1e6:.1f} MB ({memory['ratio']:.0%})")
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(args.output)
+
+    too_big = [result for result in report['results'] if result['memory']['ratio'] > args.max_memory_ratio]
+    for result in too_big:
+        print(f"ERRO: {result['rows']} linhas ocupam {result['memory']['ratio']:.0%} da representação sem esquema"
+              f" (máximo {args.max_memory_ratio:.0%})", file=sys.stderr)
+    if too_big:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
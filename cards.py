@@ -0,0 +1,80 @@
+"""Cartões HTML de jogadores: uma lista inteira num só elemento, com os fragmentos em cache
+
+O HTML de cada cartão é construído de forma vetorizada para os jogadores que
+ainda não estão em cache e guardado por (jogador, variante, função no onze) numa
+cache por versão do dataset, partilhada entre sessões; o jogador é o ID ou, sem
+coluna ID, o índice da linha no dataset. A lista é enviada ao browser com um
+único st.markdown.
+"""
+import base64
+import html
+import numpy as np
+import pandas as pd
+import streamlit as st
+from utils import dataset_version, get_player_rating_color
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def _fragment_store(version):
+    # Fragmentos HTML por (jogador, variante, função no onze) para uma versão do dataset (ver _player_keys)
+    return {}
+
+def rating_colors(overall):
+    """Cor do rating para cada Overall (get_player_rating_color aplicada só aos valores distintos)"""
+    values, inverse = np.unique(np.asarray(overall, dtype='float64'), return_inverse=True)
+    return np.array([get_player_rating_color(value) for value in values], dtype=object)[inverse]
+
+def _player_keys(players):
+    # ID do jogador; sem coluna ID, o índice da linha (marcado, para não colidir com um ID)
+    if 'ID' in players.columns:
+        return players['ID'].tolist()
+    return [('index', label) for label in players.index]
+
+def _text(series):
+    return series.astype(str).map(html.escape)
+
+def _build_fragments(players, variant, roles):
+    # HTML do conteúdo de cada cartão (sem a foto), para todas as linhas de uma vez
+    overall = players['Overall']
+    colors = pd.Series(rating_colors(overall.to_numpy()), index=players.index)
+    position = _text(players['position_code'])
+    if variant == "xi":
+        position = _text(pd.Series(roles, index=players.index)) + " (" + position + ")"
+    details = position + " | " + players['Age'].astype(str) + " anos | " + _text(players['Value'])
+    if variant == "scout":
+        growth = players['Potential'].astype(int) - overall.astype(int)
+        details = _text(players['Club']) + " | " + position + "<br>" + players['Age'].astype(str) + " anos | " \
+            + _text(players['Value']) + "<br>" + np.where(
+                growth > 0,
+                '<span class="player-growth">Potencial: +' + growth.astype(str) + '</span>',
+                '<span class="player-experienced">Jogador experiente</span>'
+            )
+    return (
+        '<div class="player-rating" style="background: ' + colors + ';">' + overall.astype(str) + '</div>'
+        + '<div class="player-info"><strong>' + _text(players['Name']) + '</strong><br><small>'
+        + details + '</small></div>'
+    ).tolist()
+
+def _photo_html(data):
+    if not data:
+        return ''
+    return f'<img class="player-photo" src="data:image/png;base64,{base64.b64encode(data).decode()}">'
+
+def player_cards_html(df, players, variant="top", roles=None, photos=None):
+    """HTML de uma lista de cartões de jogadores (variantes: "top", "xi" com roles, "scout" com fotos)"""
+    store = _fragment_store(dataset_version(df))
+    roles = list(roles) if roles is not None else [None] * len(players)
+    keys = [(player_id, variant, role) for player_id, role in zip(_player_keys(players), roles)]
+    missing = [i for i, key in enumerate(keys) if key not in store]
+    if missing:
+        fragments = _build_fragments(players.iloc[missing], variant, [roles[i] for i in missing])
+        store.update(zip((keys[i] for i in missing), fragments))
+    photos = photos if photos is not None else [None] * len(players)
+    cards = [
+        f'<div class="player-card"><div class="player-row">{_photo_html(photo)}{store[key]}</div></div>'
+        for key, photo in zip(keys, photos)
+    ]
+    return '<div class="player-card-list">' + ''.join(cards) + '</div>'
+
+def show_player_cards(df, players, variant="top", roles=None, photos=None):
+    """Mostra a lista de cartões como um único elemento"""
+    st.markdown(player_cards_html(df, players, variant, roles, photos), unsafe_allow_html=True)
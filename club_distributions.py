@@ -0,0 +1,57 @@
+"""Distribuições de Overall e Idade de todos os clubes, pré-agrupadas em intervalos com NumPy"""
+import numpy as np
+import pandas as pd
+import streamlit as st
+from utils import dataset_version
+
+# Número máximo de intervalos de cada histograma (de largura inteira, comuns a todos os clubes)
+MAX_BINS = 20
+
+def integer_bin_edges(values, max_bins=MAX_BINS):
+    """Limites de intervalos de largura inteira que cobrem os valores, no máximo max_bins"""
+    values = np.asarray(values, dtype='float64')
+    values = values[~np.isnan(values)]
+    if len(values) == 0:
+        return np.array([0, 1])
+    low, high = int(np.floor(values.min())), int(np.floor(values.max())) + 1
+    width = max(1, int(np.ceil((high - low) / max_bins)))
+    return np.arange(low, high + width, width)
+
+class ClubDistributions:
+    """Histogramas clube x intervalo de Overall e de Idade, calculados numa só passagem
+
+    overall/age são DataFrames de contagens (clubes nas linhas, intervalos "a-b" nas
+    colunas): o tamanho não depende do número de jogadores de cada clube.
+    """
+
+    def __init__(self, df):
+        clubs = df['Club'].cat
+        self.clubs = pd.Index(clubs.categories.astype(object), name='Club')
+        codes = clubs.codes.to_numpy().astype('int64')
+        self.overall = self._histogram(codes, df['Overall'].to_numpy(dtype='float64'))
+        self.age = self._histogram(codes, df['Age'].to_numpy(dtype='float64'))
+        # Clubes sem jogadores (categorias vazias) ficam de fora
+        present = self.overall.sum(axis=1) > 0
+        self.overall, self.age = self.overall[present], self.age[present]
+
+    def _histogram(self, codes, values):
+        edges = integer_bin_edges(values)
+        n_bins = len(edges) - 1
+        valid = (codes >= 0) & ~np.isnan(values)
+        bins = np.clip(np.searchsorted(edges, values[valid], side='right') - 1, 0, n_bins - 1)
+        counts = np.bincount(codes[valid] * n_bins + bins, minlength=len(self.clubs) * n_bins)
+        labels = [f"{low}-{high - 1}" if high - low > 1 else str(low) for low, high in zip(edges[:-1], edges[1:])]
+        return pd.DataFrame(counts.reshape(len(self.clubs), n_bins), index=self.clubs,
+                            columns=pd.Index(labels, name='bin'))
+
+    def for_clubs(self, clubs, stat='overall'):
+        """Contagens por intervalo (linhas) para cada clube (colunas)"""
+        return getattr(self, stat).loc[list(clubs)].T
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def _build_club_distributions(_df, version):
+    return ClubDistributions(_df)
+
+def get_club_distributions(df):
+    """Histogramas por clube do dataset, construídos uma vez por versão"""
+    return _build_club_distributions(df, dataset_version(df))
@@ -0,0 +1,101 @@
+"""Cache binária (Feather) do dataset limpo, guardada ao lado do CSV"""
+import hashlib
+import json
+import os
+import pandas as pd
+import pyarrow as pa
+from pyarrow import feather
+
+# Incrementar sempre que a limpeza/tipagem dos dados mudar, para invalidar caches antigas
+CACHE_FORMAT_VERSION = 3
+
+def cache_paths(csv_path):
+    """Caminhos do ficheiro Feather e do ficheiro de metadados associados a um CSV"""
+    base = os.path.splitext(csv_path)[0]
+    return f"{base}.feather", f"{base}.cache.json"
+
+def file_sha256(path, chunk_size=1 << 20):
+    """Hash SHA-256 do conteúdo de um ficheiro, lido por blocos"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def fingerprint(csv_path, previous=None):
+    """Impressão digital do CSV (tamanho, mtime e hash do conteúdo)
+
+    Se o tamanho e o mtime coincidem com a impressão anterior, o hash é reutilizado
+    sem voltar a ler o ficheiro.
+    """
+    stat = os.stat(csv_path)
+    fp = {
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'format': CACHE_FORMAT_VERSION,
+    }
+    if previous and previous.get('size') == fp['size'] and previous.get('mtime_ns') == fp['mtime_ns']:
+        fp['sha256'] = previous.get('sha256')
+    else:
+        fp['sha256'] = file_sha256(csv_path)
+    return fp
+
+# As strings voltam da cache como strings pyarrow (buffer contíguo), não como objetos Python
+_ARROW_STRING_TYPES = {pa.string(): pd.StringDtype('pyarrow'), pa.large_string(): pd.StringDtype('pyarrow')}
+
+def read_feather(path):
+    """Lê a cache Feather mantendo as colunas de texto como strings pyarrow"""
+    return feather.read_table(path).to_pandas(types_mapper=_ARROW_STRING_TYPES.get)
+
+def _read_meta(meta_path):
+    try:
+        with open(meta_path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _write_atomic(path, write):
+    tmp_path = f"{path}.tmp"
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+def _write_meta(meta_path, fp):
+    def write(tmp_path):
+        with open(tmp_path, 'w') as f:
+            json.dump(fp, f)
+    _write_atomic(meta_path, write)
+
+def load_cached_dataset(csv_path, build):
+    """Carrega o dataset limpo da cache binária, reconstruindo-a com build(csv_path) se o CSV mudou
+
+    A versão do dataset (prefixo do hash do CSV) fica em df.attrs['version'].
+    """
+    feather_path, meta_path = cache_paths(csv_path)
+    meta = _read_meta(meta_path)
+    fp = fingerprint(csv_path, meta)
+
+    df = None
+    if (meta and meta.get('sha256') == fp['sha256'] and meta.get('format') == CACHE_FORMAT_VERSION
+            and os.path.exists(feather_path)):
+        try:
+            df = read_feather(feather_path)
+        except Exception:
+            df = None
+        if df is not None and meta.get('mtime_ns') != fp['mtime_ns']:
+            # Conteúdo igual mas ficheiro tocado: só atualiza os metadados
+            try:
+                _write_meta(meta_path, fp)
+            except OSError:
+                pass
+
+    if df is None:
+        df = build(csv_path).reset_index(drop=True)
+        try:
+            _write_atomic(feather_path, df.to_feather)
+            _write_meta(meta_path, fp)
+        except Exception:
+            # Sem permissões de escrita ou coluna não serializável: segue sem cache
+            pass
+
+    df.attrs['version'] = f"{fp['sha256'][:16]}-v{CACHE_FORMAT_VERSION}"
+    return df
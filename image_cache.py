@@ -0,0 +1,259 @@
+"""Cache local de imagens (fotos e logos): sessão HTTP partilhada, LRU em disco e miniaturas"""
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from functools import lru_cache
+from io import BytesIO
+
+# requests e PIL só são importados quando há imagens para descarregar ou gerar
+# (a cache em disco serve a maior parte dos pedidos sem eles)
+
+CACHE_DIR = os.environ.get("FOOTDATA_IMAGE_CACHE", "data/image_cache")
+MAX_CACHE_BYTES = 200 * 1024 * 1024
+MAX_AGE_SECONDS = 7 * 24 * 3600
+REQUEST_TIMEOUT = 5
+
+# Pré-carregamento concorrente: número de threads e tempo máximo de espera por página
+PREFETCH_WORKERS = 8
+PREFETCH_TIMEOUT = 6
+
+# URLs que falharam recentemente não são pedidas de novo durante este intervalo
+FAILURE_TTL_SECONDS = 600
+
+class DiskImageCache:
+    """Armazenamento LRU em disco com limite de tamanho total e de idade
+
+    A data de modificação (mtime) marca quando a imagem foi obtida e serve para o
+    limite de idade; a data de acesso (atime) é atualizada explicitamente a cada
+    leitura e define a ordem LRU na remoção.
+    """
+
+    def __init__(self, directory=CACHE_DIR, max_bytes=MAX_CACHE_BYTES, max_age=MAX_AGE_SECONDS):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._size = None
+
+    def _path(self, key):
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, digest[:2], digest)
+
+    def get(self, key):
+        """Bytes guardados para a chave, ou None se não existirem ou estiverem expirados"""
+        path = self._path(key)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        now = time.time()
+        if now - stat.st_mtime > self.max_age:
+            self._remove(path, stat.st_size)
+            return None
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            os.utime(path, (now, stat.st_mtime))
+        except OSError:
+            return None
+        return data
+
+    def put(self, key, data):
+        """Guarda os bytes para a chave e remove as entradas menos usadas se o limite for excedido"""
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            previous = os.path.getsize(path) if os.path.exists(path) else 0
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            return
+        with self._lock:
+            if self._size is None:
+                self._size = self._scan_size()
+            else:
+                self._size += len(data) - previous
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _remove(self, path, size):
+        try:
+            os.remove(path)
+        except OSError:
+            return
+        with self._lock:
+            if self._size is not None:
+                self._size -= size
+
+    def _entries(self):
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith('.tmp'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                yield stat.st_atime, stat.st_size, path
+
+    def _scan_size(self):
+        return sum(size for _, size, _ in self._entries())
+
+    def _evict(self):
+        # Remove por ordem de último acesso até ficar abaixo de 90% do limite
+        target = self.max_bytes * 0.9
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+        self._size = total
+
+_session = None
+_cache = None
+_executor = None
+_init_lock = threading.Lock()
+_failures = {}
+
+def get_session():
+    """Sessão HTTP partilhada, com pool de ligações reutilizadas entre pedidos"""
+    global _session
+    if _session is None:
+        with _init_lock:
+            if _session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=16, pool_maxsize=32, max_retries=1)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                session.headers['User-Agent'] = 'FootData/1.0'
+                _session = session
+    return _session
+
+def get_image_cache():
+    """Cache de imagens em disco partilhada pelo processo"""
+    global _cache
+    if _cache is None:
+        with _init_lock:
+            if _cache is None:
+                _cache = DiskImageCache()
+    return _cache
+
+def fetch_image_bytes(url, timeout=REQUEST_TIMEOUT):
+    """Bytes da imagem original, da cache em disco ou descarregados pela sessão partilhada"""
+    if not isinstance(url, str) or not url.startswith('http'):
+        return None
+    cache = get_image_cache()
+    data = cache.get(url)
+    if data is not None:
+        return data
+    failed_at = _failures.get(url)
+    if failed_at is not None and time.time() - failed_at < FAILURE_TTL_SECONDS:
+        return None
+    import requests
+    try:
+        response = get_session().get(url, timeout=timeout)
+        response.raise_for_status()
+        data = response.content
+    except requests.RequestException:
+        _failures[url] = time.time()
+        return None
+    _failures.pop(url, None)
+    cache.put(url, data)
+    return data
+
+def get_thumbnail(url, width, timeout=REQUEST_TIMEOUT):
+    """Miniatura PNG da imagem com a largura pedida (sem ampliar), guardada em cache; None se falhar"""
+    if not isinstance(url, str) or not url.startswith('http'):
+        return None
+    cache = get_image_cache()
+    key = f"{url}#w{width}"
+    data = cache.get(key)
+    if data is not None:
+        return data
+    original = fetch_image_bytes(url, timeout=timeout)
+    if original is None:
+        return None
+    from PIL import Image
+    try:
+        image = Image.open(BytesIO(original))
+        if image.width > width:
+            height = max(1, round(image.height * width / image.width))
+            image = image.resize((width, height), Image.LANCZOS)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA')
+        buffer = BytesIO()
+        image.save(buffer, format='PNG', optimize=True)
+        data = buffer.getvalue()
+    except Exception:
+        return None
+    cache.put(key, data)
+    return data
+
+@lru_cache(maxsize=16)
+def placeholder_image(width, kind="player"):
+    """Imagem PNG gerada localmente para quando a foto ou o logo não estão disponíveis"""
+    from PIL import Image, ImageDraw, ImageFont
+    size = max(16, int(width))
+    image = Image.new('RGBA', (size, size), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(image)
+    if kind == "club":
+        draw.ellipse((0, 0, size - 1, size - 1), fill=(42, 82, 152, 255))
+        try:
+            font = ImageFont.load_default(size=max(8, size // 3))
+        except TypeError:
+            font = ImageFont.load_default()
+        draw.text((size / 2, size / 2), "FC", fill="white", font=font, anchor="mm")
+    else:
+        draw.rectangle((0, 0, size - 1, size - 1), fill=(220, 224, 230, 255))
+        draw.ellipse((size * 0.32, size * 0.14, size * 0.68, size * 0.50), fill=(150, 158, 170, 255))
+        draw.ellipse((size * 0.14, size * 0.56, size * 0.86, size * 1.20), fill=(150, 158, 170, 255))
+    buffer = BytesIO()
+    image.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _init_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=PREFETCH_WORKERS, thread_name_prefix="image-prefetch")
+    return _executor
+
+def prefetch_thumbnails(urls, width, kind="player", timeout=PREFETCH_TIMEOUT, block=True):
+    """Obtém em paralelo as miniaturas de todas as URLs de uma página
+
+    Devolve um dicionário URL -> bytes PNG; URLs inválidas, falhas e pedidos que
+    excedem o timeout ficam com a imagem de substituição local. Com block=False
+    os pedidos só aquecem a cache e o resultado é um dicionário vazio.
+    """
+    unique = list(dict.fromkeys(urls))
+    pending = {}
+    images = {}
+    cache = get_image_cache()
+    for url in unique:
+        data = cache.get(f"{url}#w{width}") if isinstance(url, str) else None
+        if data is not None:
+            images[url] = data
+        elif isinstance(url, str) and url.startswith('http'):
+            pending[url] = _get_executor().submit(get_thumbnail, url, width)
+    if not block:
+        return {}
+
+    done, _ = wait(pending.values(), timeout=timeout)
+    for url, future in pending.items():
+        if future in done and future.exception() is None:
+            images[url] = future.result()
+    placeholder = placeholder_image(width, kind)
+    return {url: images.get(url) or placeholder for url in unique}
@@ -0,0 +1,166 @@
+"""Instrumentação opcional dos caminhos críticos (tempo, nº de chamadas e tamanho dos DataFrames)
+
+Ativa-se com a variável de ambiente FOOTDATA_PROFILE=1. Desligada, o decorador
+timed devolve a própria função e as restantes funções não fazem nada, pelo que
+o custo é nulo.
+
+Cada execução do script (ou de um fragmento) produz um registo com o tempo,
+o número de chamadas e o maior DataFrame visto por função, que é:
+  - mostrado no painel de debug da barra lateral;
+  - acrescentado em JSON lines a FOOTDATA_METRICS_LOG;
+  - acumulado no ficheiro de texto Prometheus FOOTDATA_PROMETHEUS_FILE.
+"""
+import functools
+import json
+import os
+import threading
+import time
+
+ENABLED = os.environ.get("FOOTDATA_PROFILE", "").lower() not in ("", "0", "false", "no")
+METRICS_LOG = os.environ.get("FOOTDATA_METRICS_LOG", "data/metrics.jsonl")
+PROMETHEUS_FILE = os.environ.get("FOOTDATA_PROMETHEUS_FILE", "data/footdata.prom")
+
+# Cada sessão do Streamlit corre o script na sua própria thread
+_local = threading.local()
+_totals_lock = threading.Lock()
+_totals = {}
+_runs_total = 0
+
+def _frame_rows(values):
+    rows = None
+    for value in values:
+        shape = getattr(value, 'shape', None)
+        if shape is not None and hasattr(value, 'columns'):
+            rows = max(rows or 0, shape[0])
+    return rows
+
+def _record(name, elapsed, rows):
+    records = _local.records
+    entry = records.get(name)
+    if entry is None:
+        entry = records[name] = {'calls': 0, 'total_s': 0.0, 'max_s': 0.0, 'rows': None}
+    entry['calls'] += 1
+    entry['total_s'] += elapsed
+    entry['max_s'] = max(entry['max_s'], elapsed)
+    if rows is not None:
+        entry['rows'] = max(entry['rows'] or 0, rows)
+
+def begin_run(label="rerun"):
+    """Inicia o registo de uma execução do script"""
+    if not ENABLED:
+        return
+    _local.records = {}
+    _local.label = label
+    _local.started = time.perf_counter()
+    _local.active = True
+
+def end_run():
+    """Fecha a execução atual e exporta as métricas; devolve o registo (ou None se desligado)"""
+    if not ENABLED or not getattr(_local, 'active', False):
+        return None
+    _local.active = False
+    run = {
+        'ts': time.time(),
+        'run': _local.label,
+        'total_s': time.perf_counter() - _local.started,
+        'functions': _local.records,
+    }
+    _local.last_run = run
+    _export(run)
+    return run
+
+def last_run():
+    """Último registo completo da sessão atual"""
+    return getattr(_local, 'last_run', None)
+
+def timed(name=None):
+    """Decorador que mede tempo, chamadas e tamanho dos DataFrames; sem efeito se desligado"""
+    def decorator(func):
+        if not ENABLED:
+            return func
+        label = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            # Chamadas fora de uma execução (ex.: reexecução de um fragmento) formam a sua própria execução
+            standalone = not getattr(_local, 'active', False)
+            if standalone:
+                begin_run(label)
+            start = time.perf_counter()
+            result = None
+            try:
+                result = func(*args, **kwargs)
+                return result
+            finally:
+                elapsed = time.perf_counter() - start
+                _record(label, elapsed, _frame_rows([*args, *kwargs.values(), result]))
+                if standalone:
+                    end_run()
+        return wrapper
+    return decorator
+
+def _export(run):
+    global _runs_total
+    with _totals_lock:
+        _runs_total += 1
+        for name, entry in run['functions'].items():
+            total = _totals.setdefault(name, {'calls': 0, 'total_s': 0.0, 'rows': 0})
+            total['calls'] += entry['calls']
+            total['total_s'] += entry['total_s']
+            if entry['rows'] is not None:
+                total['rows'] = entry['rows']
+        lines = [
+            "# HELP footdata_runs_total Execuções do script instrumentadas",
+            "# TYPE footdata_runs_total counter",
+            f"footdata_runs_total {_runs_total}",
+            "# HELP footdata_function_seconds_total Tempo acumulado por função instrumentada",
+            "# TYPE footdata_function_seconds_total counter",
+        ]
+        lines += [f'footdata_function_seconds_total{{name="{name}"}} {total["total_s"]:.6f}'
+                  for name, total in sorted(_totals.items())]
+        lines += [
+            "# HELP footdata_function_calls_total Número de chamadas por função instrumentada",
+            "# TYPE footdata_function_calls_total counter",
+        ]
+        lines += [f'footdata_function_calls_total{{name="{name}"}} {total["calls"]}'
+                  for name, total in sorted(_totals.items())]
+        lines += [
+            "# HELP footdata_dataframe_rows Linhas do maior DataFrame visto na última chamada",
+            "# TYPE footdata_dataframe_rows gauge",
+        ]
+        lines += [f'footdata_dataframe_rows{{name="{name}"}} {total["rows"]}'
+                  for name, total in sorted(_totals.items())]
+        try:
+            if METRICS_LOG:
+                os.makedirs(os.path.dirname(METRICS_LOG) or '.', exist_ok=True)
+                with open(METRICS_LOG, 'a') as f:
+                    f.write(json.dumps(run) + "\n")
+            if PROMETHEUS_FILE:
+                os.makedirs(os.path.dirname(PROMETHEUS_FILE) or '.', exist_ok=True)
+                tmp_path = f"{PROMETHEUS_FILE}.tmp"
+                with open(tmp_path, 'w') as f:
+                    f.write("\n".join(lines) + "\n")
+                os.replace(tmp_path, PROMETHEUS_FILE)
+        except OSError:
+            pass
+
+def show_debug_panel():
+    """Painel recolhível na barra lateral com as métricas da última execução"""
+    if not ENABLED:
+        return
+    import pandas as pd
+    import streamlit as st
+
+    run = last_run()
+    with st.sidebar.expander("⏱️ Debug de desempenho", expanded=False):
+        if not run:
+            st.caption("Sem métricas registadas ainda.")
+            return
+        st.caption(f"Execução '{run['run']}': {run['total_s'] * 1000:.1f} ms")
+        table = pd.DataFrame.from_dict(run['functions'], orient='index')
+        table['total_ms'] = table['total_s'] * 1000
+        table['max_ms'] = table['max_s'] * 1000
+        st.dataframe(
+            table[['calls', 'total_ms', 'max_ms', 'rows']].sort_values('total_ms', ascending=False),
+            use_container_width=True
+        )
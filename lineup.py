@@ -0,0 +1,215 @@
+"""Escolha do onze inicial por formação: atribuição ótima de jogadores a lugares pela posição"""
+import numpy as np
+import pandas as pd
+import streamlit as st
+from utils import dataset_delta, dataset_version
+
+DEFAULT_FORMATION = "4-3-3"
+
+# Lugares de cada formação: (função, x, y) no campo 100x90, do guarda-redes ao ataque
+FORMATIONS = {
+    "4-3-3": [
+        ("GK", 50, 5),
+        ("LB", 20, 25), ("CB", 40, 25), ("CB", 60, 25), ("RB", 80, 25),
+        ("CM", 30, 50), ("CM", 50, 50), ("CM", 70, 50),
+        ("LW", 25, 75), ("ST", 50, 85), ("RW", 75, 75),
+    ],
+    "4-4-2": [
+        ("GK", 50, 5),
+        ("LB", 20, 25), ("CB", 40, 25), ("CB", 60, 25), ("RB", 80, 25),
+        ("LM", 15, 52), ("CM", 38, 50), ("CM", 62, 50), ("RM", 85, 52),
+        ("ST", 38, 80), ("ST", 62, 80),
+    ],
+    "4-2-3-1": [
+        ("GK", 50, 5),
+        ("LB", 20, 25), ("CB", 40, 25), ("CB", 60, 25), ("RB", 80, 25),
+        ("DM", 38, 42), ("DM", 62, 42),
+        ("LW", 22, 65), ("AM", 50, 65), ("RW", 78, 65),
+        ("ST", 50, 85),
+    ],
+    "3-5-2": [
+        ("GK", 50, 5),
+        ("CB", 30, 25), ("CB", 50, 22), ("CB", 70, 25),
+        ("LM", 12, 50), ("DM", 50, 42), ("CM", 32, 55), ("CM", 68, 55), ("RM", 88, 50),
+        ("ST", 38, 80), ("ST", 62, 80),
+    ],
+}
+
+# Posições do dataset aptas para cada função: naturais (sem penalização) e compatíveis
+ROLE_POSITIONS = {
+    "GK": (["GK"], []),
+    "CB": (["CB", "LCB", "RCB"], ["CDM"]),
+    "LB": (["LB", "LWB"], ["LM", "CB"]),
+    "RB": (["RB", "RWB"], ["RM", "CB"]),
+    "DM": (["CDM", "LDM", "RDM"], ["CM", "LCM", "RCM", "CB"]),
+    "CM": (["CM", "LCM", "RCM"], ["CDM", "CAM", "LDM", "RDM"]),
+    "AM": (["CAM", "LAM", "RAM"], ["CM", "CF", "LCM", "RCM"]),
+    "LM": (["LM", "LW"], ["LWB", "LB", "CM", "LF"]),
+    "RM": (["RM", "RW"], ["RWB", "RB", "CM", "RF"]),
+    "LW": (["LW", "LF", "LM"], ["ST", "CAM", "LS"]),
+    "RW": (["RW", "RF", "RM"], ["ST", "CAM", "RS"]),
+    "ST": (["ST", "CF", "LS", "RS"], ["LF", "RF", "LW", "RW", "CAM"]),
+}
+
+# Penalizações (pontos de Overall) por jogar fora da posição natural
+COMPATIBLE_PENALTY = 3
+OUT_OF_POSITION_PENALTY = 15
+# Guarda-redes a jogar fora da baliza (ou o contrário): só se não houver alternativa
+GOALKEEPER_SWAP_PENALTY = 60
+
+def slot_penalties(roles, positions):
+    """Matriz (lugares x jogadores) de penalizações pela posição de cada jogador"""
+    positions = np.asarray(positions, dtype=object)
+    is_gk = positions == "GK"
+    penalties = np.empty((len(roles), len(positions)), dtype='float64')
+    for i, role in enumerate(roles):
+        natural, compatible = ROLE_POSITIONS[role]
+        row = np.full(len(positions), float(OUT_OF_POSITION_PENALTY))
+        row[np.isin(positions, compatible)] = COMPATIBLE_PENALTY
+        row[np.isin(positions, natural)] = 0
+        if role == "GK":
+            row[~is_gk] = GOALKEEPER_SWAP_PENALTY
+        else:
+            row[is_gk] = GOALKEEPER_SWAP_PENALTY
+        penalties[i] = row
+    return penalties
+
+def solve_assignment(cost):
+    """Algoritmo húngaro (custo mínimo) para uma matriz n x m com n <= m
+
+    Devolve, para cada linha, a coluna atribuída. Os planteis têm poucas dezenas de
+    jogadores, tamanho para o qual listas Python são mais rápidas do que NumPy.
+    """
+    cost = cost.tolist() if hasattr(cost, 'tolist') else cost
+    n, m = len(cost), len(cost[0])
+    inf = float('inf')
+    u = [0.0] * (n + 1)
+    v = [0.0] * (m + 1)
+    owner = [0] * (m + 1)  # linha (1-based) atribuída a cada coluna; 0 = livre
+    way = [0] * (m + 1)
+    for i in range(1, n + 1):
+        owner[0] = i
+        j0 = 0
+        min_v = [inf] * (m + 1)
+        used = [False] * (m + 1)
+        while True:
+            used[j0] = True
+            i0 = owner[j0]
+            row = cost[i0 - 1]
+            u_i0 = u[i0]
+            delta = inf
+            j1 = 0
+            for j in range(1, m + 1):
+                if not used[j]:
+                    reduced = row[j - 1] - u_i0 - v[j]
+                    if reduced < min_v[j]:
+                        min_v[j] = reduced
+                        way[j] = j0
+                    if min_v[j] < delta:
+                        delta = min_v[j]
+                        j1 = j
+            for j in range(m + 1):
+                if used[j]:
+                    u[owner[j]] += delta
+                    v[j] -= delta
+                else:
+                    min_v[j] -= delta
+            j0 = j1
+            if owner[j0] == 0:
+                break
+        while j0:
+            j1 = way[j0]
+            owner[j0] = owner[j1]
+            j0 = j1
+    assignment = np.full(n, -1, dtype='int64')
+    for column in range(1, m + 1):
+        if owner[column]:
+            assignment[owner[column] - 1] = column - 1
+    return assignment
+
+def _solve_lineup(overall, penalties):
+    # overall: (jogadores,), penalties: (lugares x jogadores)
+    n_slots = penalties.shape[0]
+    lineup = np.full(n_slots, -1, dtype='int64')
+    if len(overall) == 0:
+        return lineup
+
+    scores = overall[None, :] - penalties
+
+    # Reduz o problema aos 11 melhores de cada lugar: um jogador fora de todas essas
+    # listas nunca melhora a solução (há sempre um melhor livre para o seu lugar)
+    top = np.argsort(-scores, axis=1, kind='stable')[:, :n_slots]
+    candidates = np.unique(top)
+
+    if len(candidates) >= n_slots:
+        chosen = solve_assignment(-scores[:, candidates])
+        lineup[:] = candidates[chosen]
+    else:
+        # Plantel curto: preenche os lugares possíveis e deixa os restantes vazios
+        chosen = solve_assignment(-scores[:, candidates].T)
+        lineup[chosen] = candidates
+    return lineup
+
+def best_lineup(overall, positions, formation=DEFAULT_FORMATION):
+    """Índices (no plantel dado) do jogador em cada lugar da formação; -1 se faltarem jogadores
+
+    Maximiza a soma de Overall menos as penalizações por posição.
+    """
+    roles = [role for role, _, _ in FORMATIONS[formation]]
+    return _solve_lineup(np.asarray(overall, dtype='float64'), slot_penalties(roles, positions))
+
+def solve_all_lineups(df, formation=DEFAULT_FORMATION, clubs=None):
+    """Onze de todos os clubes (ou só dos indicados) numa só passagem: dicionário clube -> posições (iloc) por lugar"""
+    roles = [role for role, _, _ in FORMATIONS[formation]]
+    positions = df['position_code'].cat
+    # Penalizações por (lugar, código de posição), calculadas uma vez para todos os clubes
+    penalty_table = slot_penalties(roles, positions.categories.astype(str))
+    codes = positions.codes
+    overall = df['Overall'].to_numpy(dtype='float64')
+    groups = df.groupby('Club', sort=False, observed=True).indices
+    if clubs is not None:
+        groups = {club: groups[club] for club in clubs if club in groups}
+    lineups = {}
+    for club, rows in groups.items():
+        slots = _solve_lineup(overall[rows], penalty_table[:, codes[rows]])
+        lineups[club] = np.where(slots >= 0, rows[np.maximum(slots, 0)], -1)
+    return lineups
+
+@st.cache_resource(show_spinner=False, max_entries=2 * len(FORMATIONS))
+def _build_lineups(_df, formation, version):
+    delta = dataset_delta(_df)
+    if delta is None:
+        return solve_all_lineups(_df, formation)
+    # Recarregamento incremental: os clubes sem alterações mantêm o onze, com as posições remapeadas
+    previous = _build_lineups(delta.previous, formation, dataset_version(delta.previous))
+    lineups = {club: np.where(rows >= 0, delta.row_map[rows], -1)
+               for club, rows in previous.items() if club not in delta.changed_clubs}
+    lineups.update(solve_all_lineups(_df, formation, clubs=delta.changed_clubs))
+    return lineups
+
+def get_all_lineups(df, formation=DEFAULT_FORMATION):
+    """Onzes pré-calculados de todos os clubes: dicionário clube -> posições (iloc) por lugar, -1 se vazio"""
+    return _build_lineups(df, formation, dataset_version(df))
+
+def get_starting_xi(df, club, formation=DEFAULT_FORMATION):
+    """Onze inicial pré-calculado de um clube: DataFrame com uma linha por lugar (colunas slot_role/x/y)"""
+    rows = _build_lineups(df, formation, dataset_version(df)).get(club)
+    if rows is None:
+        return df.iloc[:0].assign(slot_role=pd.Series(dtype=object), slot_x=pd.Series(dtype='int64'),
+                                  slot_y=pd.Series(dtype='int64'))
+    return lineup_frame(df, rows, formation)
+
+def lineup_frame(df, rows, formation=DEFAULT_FORMATION):
+    """DataFrame do onze a partir das posições (iloc) de cada lugar (-1 = vazio), com as colunas slot_role/x/y"""
+    slots = FORMATIONS[formation]
+    filled = rows >= 0
+    xi = df.iloc[rows[filled]].copy()
+    xi['slot_role'] = [role for (role, _, _), ok in zip(slots, filled) if ok]
+    xi['slot_x'] = [x for (_, x, _), ok in zip(slots, filled) if ok]
+    xi['slot_y'] = [y for (_, _, y), ok in zip(slots, filled) if ok]
+    return xi
+
+def precompute_lineups(df):
+    """Resolve o onze de todos os clubes para todas as formações (em cache por versão do dataset)"""
+    for formation in FORMATIONS:
+        _build_lineups(df, formation, dataset_version(df))
@@ -0,0 +1,167 @@
+"""Recarregamento automático do players.csv: deteta alterações, aplica o delta por ID e troca o snapshot
+
+Uma thread verifica periodicamente (os.stat) o CSV. Quando o ficheiro muda e
+fica estável, o novo dataset é lido e comparado com o atual pelo ID do jogador
+(inserções, atualizações e remoções). As caches derivadas do novo snapshot são
+construídas antes da troca, reaproveitando as dos clubes sem alterações; até lá
+as sessões continuam a usar o snapshot anterior.
+"""
+import itertools
+import logging
+import os
+import threading
+import time
+import numpy as np
+import pandas as pd
+import streamlit as st
+from data_cache import load_cached_dataset
+from instrumentation import timed
+from utils import (DATA_PATH, DatasetDelta, _build_club_index, dataset_version,
+                   get_club_summary, load_data, read_players_csv, register_delta)
+
+HOT_RELOAD = os.environ.get("FOOTDATA_HOT_RELOAD", "1").lower() not in ("", "0", "false", "no")
+POLL_SECONDS = float(os.environ.get("FOOTDATA_RELOAD_POLL", "2"))
+
+logger = logging.getLogger(__name__)
+
+def diff_players(old, new):
+    """Compara dois datasets pelo ID do jogador
+
+    Devolve (ordem, delta): `ordem` são as posições de new que reproduzem o dataset
+    antigo com as alterações aplicadas (jogadores mantidos na mesma ordem, novos no
+    fim). Devolve None se a comparação não for possível (sem ID único ou colunas diferentes).
+    """
+    if ('ID' not in old.columns or list(old.columns) != list(new.columns)
+            or not old['ID'].is_unique or not new['ID'].is_unique):
+        return None
+    old_ids = pd.Index(old['ID'])
+    new_ids = pd.Index(new['ID'])
+
+    new_rows = new_ids.get_indexer(old_ids)
+    kept = new_rows >= 0
+    inserted = np.flatnonzero(old_ids.get_indexer(new_ids) < 0)
+
+    # Jogadores mantidos cujo conteúdo mudou (hash de todas as colunas da linha)
+    old_hash = pd.util.hash_pandas_object(old, index=False).to_numpy()
+    new_hash = pd.util.hash_pandas_object(new, index=False).to_numpy()
+    updated = np.flatnonzero(kept)[old_hash[kept] != new_hash[new_rows[kept]]]
+    deleted = np.flatnonzero(~kept)
+
+    changed_clubs = frozenset(itertools.chain(
+        old['Club'].iloc[deleted], old['Club'].iloc[updated],
+        new['Club'].iloc[new_rows[updated]], new['Club'].iloc[inserted],
+    ))
+    row_map = np.full(len(old), -1, dtype='int64')
+    row_map[kept] = np.arange(kept.sum())
+    delta = DatasetDelta(
+        previous=old,
+        row_map=row_map,
+        inserted=new_ids[inserted],
+        updated=old_ids[updated],
+        deleted=old_ids[deleted],
+        changed_clubs=changed_clubs,
+    )
+    return np.concatenate([new_rows[kept], inserted]), delta
+
+def warm_derived_caches(df):
+    """Constrói as caches derivadas de um snapshot (antes de este ser servido às sessões)"""
+    from club_distributions import get_club_distributions
+    from lineup import precompute_lineups
+    from position_strength import get_position_strength
+    from scouting import get_scouting_index
+    from similarity import get_similarity_index
+
+    get_club_summary(df)
+    _build_club_index(df, dataset_version(df))
+    precompute_lineups(df)
+    get_scouting_index(df)
+    get_similarity_index(df)
+    get_position_strength(df)
+    get_club_distributions(df)
+
+class LiveDataset:
+    """Snapshot atual do dataset, substituído em segundo plano quando o CSV muda"""
+
+    def __init__(self, path=DATA_PATH, initial=None, poll_seconds=POLL_SECONDS):
+        self.path = path
+        self.poll_seconds = poll_seconds
+        self.current = initial if initial is not None else load_cached_dataset(path, read_players_csv)
+        self._stat = self._file_stat()
+        self._reloads = itertools.count(1)
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def _file_stat(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
+
+    def start(self):
+        """Inicia a thread que vigia o ficheiro"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._watch, name="players-csv-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def _watch(self):
+        pending = None
+        while True:
+            time.sleep(self.poll_seconds)
+            stat = self._file_stat()
+            if stat is None or stat == self._stat:
+                pending = None
+            elif stat != pending:
+                # Espera que o ficheiro deixe de mudar (cópia ainda em curso)
+                pending = stat
+            else:
+                pending = None
+                try:
+                    self.reload()
+                except Exception:
+                    logger.exception("Falha ao recarregar %s; continua o snapshot anterior", self.path)
+
+    def reload(self):
+        """Lê o CSV, aplica o delta ao snapshot atual e troca-o; devolve o delta (ou None se nada mudou)"""
+        with self._lock:
+            stat = self._file_stat()
+            new = load_cached_dataset(self.path, read_players_csv)
+            self._stat = stat
+            old = self.current
+            diff = diff_players(old, new)
+            if diff is None:
+                snapshot, delta = new, None
+            else:
+                order, delta = diff
+                if not (len(delta.inserted) or len(delta.updated) or len(delta.deleted)):
+                    return None
+                snapshot = new.take(order).reset_index(drop=True)
+
+            # Versão única no processo: a ordem das linhas depende do histórico de recarregamentos
+            snapshot.attrs['version'] = f"{dataset_version(new)}-r{next(self._reloads)}"
+            register_delta(snapshot, delta)
+            warm_derived_caches(snapshot)
+            self.current = snapshot
+            logger.info("Dataset recarregado: %s", dataset_version(snapshot))
+            return delta
+
+@st.cache_resource
+def get_live_dataset():
+    """Dataset vivo partilhado pelo processo (com a vigilância do CSV ativa, se ligada)"""
+    live = LiveDataset(initial=load_data())
+    if HOT_RELOAD:
+        live.start()
+    return live
+
+def dataset_snapshot():
+    """Cópia superficial do snapshot atual (ver load_data)"""
+    return get_live_dataset().current.copy(deep=False)
+
+@timed()
+def current_dataset():
+    """Snapshot atual para uma execução do script; uma execução deve usar sempre o mesmo
+
+    Medido em cada execução: o carregamento inicial (load_data) só acontece uma vez por processo.
+    """
+    return dataset_snapshot()
@@ -1,12 +1,11 @@
 import streamlit as st
-import pandas as pd
-import plotly.graph_objects as go
-import plotly.express as px
-from PIL import Image
-import requests
-from io import BytesIO
-from utils import *
+from utils import get_club_logo, get_club_summary
+from image_cache import prefetch_thumbnails
+from instrumentation import timed, begin_run, end_run, show_debug_panel
 from management import show_team_management
+from lineup import precompute_lineups
+from live_data import current_dataset
+from api import start_embedded_api
 
 # Configuração da página
 st.set_page_config(
@@ -24,8 +23,14 @@ def load_custom_css():
 def main():
     load_custom_css()
     
-    # Carregar dados
-    df = load_data()
+    # Carregar dados (snapshot atual, substituído em segundo plano quando o CSV muda)
+    df = current_dataset()
+    
+    # API JSON no mesmo processo (só se FOOTDATA_API_PORT estiver definido)
+    start_embedded_api()
+    
+    # Onzes de todos os clubes e formações (resolvidos uma vez por versão do dataset)
+    precompute_lineups(df)
     
     # Header
     st.markdown("""
@@ -44,16 +49,14 @@ def main():
     elif st.session_state.page == 'management':
         show_team_management(df)
 
+@timed()
 def show_club_selection(df):
     """Interface de seleção de clubes"""
     st.markdown("## 🏆 Escolha os Clubes para Comparar")
     
-    # Estatísticas dos clubes
-    club_stats = df.groupby("Club").agg({
-        'Overall': 'mean',
-        'Value': lambda x: x.apply(convert_value_to_float).sum(),
-        'Club Logo': 'first'
-    }).sort_values('Overall', ascending=False)
+    # Estatísticas dos clubes (pré-calculadas e partilhadas entre sessões)
+    club_stats = get_club_summary(df)
+    club_labels = club_stats['label'].to_dict()
     
     clubs = club_stats.index.tolist()
     
@@ -70,27 +73,26 @@ def show_club_selection(df):
             "Selecione o primeiro clube",
             clubs,
             key="left_club",
-            format_func=lambda x: f"{x} (Overall: {club_stats.loc[x, 'Overall']:.1f})"
+            format_func=club_labels.get
         )
         
         if club_left:
-            logo_left = get_club_logo(df, club_left)
-            st.image(logo_left, width=150)
+            logo_slot_left = st.empty()
             
             # Estatísticas do clube
-            club_data = df[df["Club"] == club_left]
+            club_data = club_stats.loc[club_left]
             col_stat1, col_stat2 = st.columns(2)
             
             with col_stat1:
                 st.markdown(f"""
                 <div class="metric-card">
                     <h4>Overall Médio</h4>
-                    <h2>{club_data['Overall'].mean():.1f}</h2>
+                    <h2>{club_data['overall_mean']:.1f}</h2>
                 </div>
                 """, unsafe_allow_html=True)
             
             with col_stat2:
-                total_value = club_data['Value'].apply(convert_value_to_float).sum()
+                total_value = club_data['value_total_m']
                 st.markdown(f"""
                 <div class="metric-card">
                     <h4>Valor Total</h4>
@@ -112,27 +114,26 @@ def show_club_selection(df):
             "Selecione o segundo clube",
             clubs,
             key="right_club",
-            format_func=lambda x: f"{x} (Overall: {club_stats.loc[x, 'Overall']:.1f})"
+            format_func=club_labels.get
         )
         
         if club_right:
-            logo_right = get_club_logo(df, club_right)
-            st.image(logo_right, width=150)
+            logo_slot_right = st.empty()
             
             # Estatísticas do clube
-            club_data = df[df["Club"] == club_right]
+            club_data = club_stats.loc[club_right]
             col_stat1, col_stat2 = st.columns(2)
             
             with col_stat1:
                 st.markdown(f"""
                 <div class="metric-card">
                     <h4>Overall Médio</h4>
-                    <h2>{club_data['Overall'].mean():.1f}</h2>
+                    <h2>{club_data['overall_mean']:.1f}</h2>
                 </div>
                 """, unsafe_allow_html=True)
             
             with col_stat2:
-                total_value = club_data['Value'].apply(convert_value_to_float).sum()
+                total_value = club_data['value_total_m']
                 st.markdown(f"""
                 <div class="metric-card">
                     <h4>Valor Total</h4>
@@ -140,6 +141,15 @@ def show_club_selection(df):
                 </div>
                 """, unsafe_allow_html=True)
     
+    # Logos dos dois clubes obtidos em paralelo, com imagem local se falharem
+    logo_left = get_club_logo(df, club_left)
+    logo_right = get_club_logo(df, club_right)
+    logos = prefetch_thumbnails([logo_left, logo_right], 150, kind="club")
+    if club_left:
+        logo_slot_left.image(logos[logo_left], width=150)
+    if club_right:
+        logo_slot_right.image(logos[logo_right], width=150)
+    
     # Botão para continuar
     st.markdown("---")
     col1, col2, col3 = st.columns([1, 2, 1])
@@ -155,4 +165,9 @@ def show_club_selection(df):
 
 # Executar aplicação
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    begin_run()
+    try:
+        main()
+    finally:
+        end_run()
+    show_debug_panel()
\ No newline at end of file
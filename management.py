@@ -1,9 +1,25 @@
 import streamlit as st
-import plotly.graph_objects as go
-import plotly.express as px
 import pandas as pd
-from utils import *
+from utils import (create_football_field, create_player_stats_radar, dataset_version, get_club_players,
+                   list_positions, prefetch_player_photos)
+from scouting import PAGE_SIZE, get_scouting_index
+from image_cache import prefetch_thumbnails
+from instrumentation import timed
+from similarity import get_similarity_index
+from lineup import FORMATIONS, get_starting_xi
+from cards import show_player_cards
+from match_simulator import (DEFAULT_MATCHES, DEFAULT_SEED, LEAGUE_MATCHES, get_league_table, get_team_ratings,
+                             most_likely_scores, simulate_match)
+from queries import (compare_clubs, head_to_head, list_clubs, position_ranking, position_strength, scouting_search,
+                     top_players)
+from transfers import get_transfer_sandbox, reset_transfer_sandbox
 
+# Acima deste número de clubes as distribuições são mostradas como mapa de calor
+MAX_GROUPED_CLUBS = 6
+# Candidatos da lista de scouting oferecidos no simulador de transferências
+TRANSFER_CANDIDATES = 50
+
+@timed()
 def show_team_management(df):
     """Interface principal de gestão de plantéis"""
     club_left = st.session_state.club_left
@@ -22,30 +38,29 @@ def show_team_management(df):
         st.session_state.page = 'selection'
         st.rerun()
     
-    # Tabs principais
-    tab1, tab2, tab3, tab4, tab5 = st.tabs([
-        "🏟️ Campo Tático", 
-        "📊 Comparação", 
-        "👤 Jogadores", 
-        "📈 Análises", 
-        "🎯 Scout"
-    ])
-    
-    with tab1:
-        show_tactical_field(df, club_left, club_right)
-    
-    with tab2:
-        show_club_comparison(df, club_left, club_right)
-    
-    with tab3:
-        show_player_analysis(df, club_left, club_right)
-    
-    with tab4:
-        show_advanced_analytics(df, club_left, club_right)
-    
-    with tab5:
-        show_scouting_system(df, club_left, club_right)
+    # Secções principais: só a secção ativa é executada, e cada uma é um
+    # fragmento que reexecuta isoladamente quando se interage com os seus widgets
+    tabs = {
+        "🏟️ Campo Tático": show_tactical_field,
+        "📊 Comparação": show_club_comparison,
+        "👤 Jogadores": show_player_analysis,
+        "📈 Análises": show_advanced_analytics,
+        "🎯 Scout": show_scouting_system,
+        "⚽ Simular Jogo": show_match_simulation,
+        "🔄 Transferências": show_transfer_sandbox,
+    }
+    active_tab = st.radio(
+        "Secção",
+        list(tabs),
+        horizontal=True,
+        key="management_tab",
+        label_visibility="collapsed"
+    )
+    
+    tabs[active_tab](df, club_left, club_right)
 
+@st.fragment
+@timed()
 def show_tactical_field(df, club_left, club_right):
     """Exibe os campos táticos dos dois clubes"""
     st.markdown("### 🏟️ Visualização Tática dos Plantéis")
@@ -54,86 +69,58 @@ def show_tactical_field(df, club_left, club_right):
     
     with col1:
         st.markdown(f"#### {club_left}")
-        field_left = create_football_field(df, club_left, "left")
+        formation_left = st.selectbox("Formação", list(FORMATIONS), key="formation_left")
+        field_left = create_football_field(df, club_left, "left", formation_left)
         st.plotly_chart(field_left, use_container_width=True, key="field_left")
         
-        # Formação e estatísticas
-        players_left = df[df["Club"] == club_left].nlargest(11, 'Overall')
+        # Formação e estatísticas (onze pré-calculado para a formação)
+        players_left = get_starting_xi(df, club_left, formation_left)
         st.markdown(f"""
         <div class="formation-display">
-            Formação: 4-3-3 | Overall Médio: {players_left['Overall'].mean():.1f}
+            Formação: {formation_left} | Overall Médio: {players_left['Overall'].mean():.1f}
         </div>
         """, unsafe_allow_html=True)
     
     with col2:
         st.markdown(f"#### {club_right}")
-        field_right = create_football_field(df, club_right, "right")
+        formation_right = st.selectbox("Formação", list(FORMATIONS), key="formation_right")
+        field_right = create_football_field(df, club_right, "right", formation_right)
         st.plotly_chart(field_right, use_container_width=True, key="field_right")
         
-        # Formação e estatísticas
-        players_right = df[df["Club"] == club_right].nlargest(11, 'Overall')
+        # Formação e estatísticas (onze pré-calculado para a formação)
+        players_right = get_starting_xi(df, club_right, formation_right)
         st.markdown(f"""
         <div class="formation-display">
-            Formação: 4-3-3 | Overall Médio: {players_right['Overall'].mean():.1f}
+            Formação: {formation_right} | Overall Médio: {players_right['Overall'].mean():.1f}
         </div>
         """, unsafe_allow_html=True)
     
+    # Aquece a cache com as fotos dos 22 titulares (usadas em "Ver Stats") sem bloquear a página
+    prefetch_player_photos(pd.concat([players_left, players_right]), 150, block=False)
+    
     # Lista de jogadores titulares
     st.markdown("---")
     st.markdown("### 👥 Plantéis Titulares")
     
     col1, col2 = st.columns(2)
     
-    with col1:
-        st.markdown(f"#### {club_left} - Starting XI")
-        for i, player in enumerate(players_left.itertuples(), 1):
-            position = extract_position(player.Position)
-            rating_color = get_player_rating_color(player.Overall)
-            
-            st.markdown(f"""
-            <div class="player-card">
-                <div style="display: flex; align-items: center;">
-                    <div style="background: {rating_color}; color: black; font-weight: bold; 
-                                padding: 0.3rem 0.6rem; border-radius: 8px; margin-right: 1rem; 
-                                min-width: 40px; text-align: center;">
-                        {player.Overall}
-                    </div>
-                    <div style="flex: 1; color: black;">
-                        <strong>{player.Name}</strong><br>
-                        <small>{position} | {player.Age} anos | {player.Value}</small>
-                    </div>
-                </div>
-            </div>
-            """, unsafe_allow_html=True)
-            
-            if st.button(f"📊 Ver Stats", key=f"stats_left_{i}"):
-                show_player_detailed_stats(player)
-    
-    with col2:
-        st.markdown(f"#### {club_right} - Starting XI")
-        for i, player in enumerate(players_right.itertuples(), 1):
-            position = extract_position(player.Position)
-            rating_color = get_player_rating_color(player.Overall)
-            
-            st.markdown(f"""
-            <div class="player-card">
-                <div style="display: flex; align-items: center;">
-                    <div style="background: {rating_color}; color: black; font-weight: bold; 
-                                padding: 0.3rem 0.6rem; border-radius: 8px; margin-right: 1rem; 
-                                min-width: 40px; text-align: center;">
-                        {player.Overall}
-                    </div>
-                    <div style="flex: 1; color: black;">
-                        <strong>{player.Name}</strong><br>
-                        <small>{position} | {player.Age} anos | {player.Value}</small>
-                    </div>
-                </div>
-            </div>
-            """, unsafe_allow_html=True)
-            
-            if st.button(f"📊 Ver Stats", key=f"stats_right_{i}"):
-                show_player_detailed_stats(player)
+    for column, club, players, side in ((col1, club_left, players_left, "left"),
+                                        (col2, club_right, players_right, "right")):
+        with column:
+            st.markdown(f"#### {club} - Starting XI")
+            # Os 11 cartões seguem como um só elemento; "Ver Stats" é um único seletor por clube,
+            # porque um botão por cartão voltaria a partir a lista em 11 elementos (mais 11 widgets)
+            show_player_cards(df, players, variant="xi", roles=players['slot_role'])
+            # Titulares identificados pela linha no dataset (a coluna ID pode não existir)
+            starters = {player.Index: player for player in players.itertuples()}
+            names = players['Name'].to_dict()
+            selected = st.selectbox("📊 Ver Stats", list(starters), index=None, format_func=names.get,
+                                    placeholder="Escolha um titular", key=f"stats_{side}")
+            if selected is not None:
+                show_player_detailed_stats(starters[selected])
+                show_similar_players(df, [players.loc[selected]], [club_left, club_right], key=f"similar_{side}")
 
+@timed()
 def show_player_detailed_stats(player):
     """Mostra estatísticas detalhadas do jogador com dados reais"""
     st.markdown("---")
@@ -143,17 +130,13 @@ def show_player_detailed_stats(player):
     
     with col1:
         # Foto e info básica
-        if hasattr(player, 'Photo') and pd.notna(player.Photo):
-            try:
-                st.image(player.Photo, width=150)
-            except:
-                st.markdown("📷 Foto não disponível")
-        else:
-            st.markdown("📷 Foto não disponível")
+        photo_url = getattr(player, 'Photo', None)
+        photos = prefetch_thumbnails([photo_url], 150)
+        st.image(photos[photo_url], width=150)
         
         st.markdown(f"""
         **Clube:** {player.Club}  
-        **Posição:** {extract_position(player.Position)}  
+        **Posição:** {player.position_code}  
         **Idade:** {player.Age} anos  
         **Nacionalidade:** {getattr(player, 'Nationality', 'N/A')}  
         **Valor:** {player.Value}  
@@ -179,110 +162,114 @@ def show_player_detailed_stats(player):
         if hasattr(player, 'International_Reputation') and pd.notna(player.International_Reputation):
             st.metric("Reputação", f"{player.International_Reputation}/5 ⭐")
 
+@st.fragment
+@timed()
 def show_club_comparison(df, club_left, club_right):
     """Comparação detalhada entre clubes"""
     st.markdown("### 📊 Comparação Detalhada")
     
-    data_left = df[df["Club"] == club_left]
-    data_right = df[df["Club"] == club_right]
+    stats_left, stats_right, difference = head_to_head(df, club_left, club_right)
     
     # Métricas principais
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        avg_left = data_left['Overall'].mean()
-        avg_right = data_right['Overall'].mean()
+        avg_left = stats_left['overall_mean']
         st.metric(
             "Overall Médio",
             f"{avg_left:.1f}",
-            f"{avg_left - avg_right:.1f}",
+            f"{difference['overall_mean']:.1f}",
             delta_color="normal"
         )
     
     with col2:
-        age_left = data_left['Age'].mean()
-        age_right = data_right['Age'].mean()
+        age_left = stats_left['age_mean']
         st.metric(
             "Idade Média",
             f"{age_left:.1f}",
-            f"{age_left - age_right:.1f}",
+            f"{difference['age_mean']:.1f}",
             delta_color="inverse"
         )
     
     with col3:
-        pot_left = data_left['Potential'].mean()
-        pot_right = data_right['Potential'].mean()
+        pot_left = stats_left['potential_mean']
         st.metric(
             "Potencial Médio",
             f"{pot_left:.1f}",
-            f"{pot_left - pot_right:.1f}",
+            f"{difference['potential_mean']:.1f}",
             delta_color="normal"
         )
     
     with col4:
-        count_left = len(data_left)
-        count_right = len(data_right)
         st.metric(
             "Total Jogadores",
-            count_left,
-            count_left - count_right
+            int(stats_left['squad_size']),
+            int(difference['squad_size'])
         )
     
-    # Gráficos comparativos
+    # Comparação de N clubes: métricas, distribuições e posições vêm das tabelas pré-calculadas
+    # para todos os clubes, e os histogramas já chegam agrupados em intervalos
     st.markdown("---")
+    st.markdown("#### 🏆 Comparação entre Clubes")
+    
+    all_clubs = list_clubs(df).index.tolist()
+    whole_league = st.checkbox("Toda a liga", key="compare_league")
+    if whole_league:
+        clubs = all_clubs
+    else:
+        clubs = st.multiselect("Clubes a comparar", all_clubs, default=[club_left, club_right],
+                               key="compare_clubs")
+    
+    if not clubs:
+        st.info("Escolha pelo menos um clube.")
+        return
+    
+    comparison = compare_clubs(df, clubs)
+    metrics, deltas = comparison.metrics, comparison.deltas
+    st.dataframe(pd.DataFrame({
+        'Overall Médio': metrics['overall_mean'].round(1),
+        'Δ Overall': deltas['overall_mean'].round(1),
+        'Idade Média': metrics['age_mean'].round(1),
+        'Δ Idade': deltas['age_mean'].round(1),
+        'Potencial Médio': metrics['potential_mean'].round(1),
+        'Jogadores': metrics['squad_size'].astype(int),
+        'Valor Total (€M)': metrics['value_total_m'].round(1),
+        'Overall do Onze': metrics['xi_overall_mean'].round(1),
+    }).sort_values('Overall Médio', ascending=False), use_container_width=True)
+    st.caption("Δ: diferença para a média dos clubes escolhidos")
     
     col1, col2 = st.columns(2)
     
     with col1:
-        # Distribuição de Overall
-        fig_overall = go.Figure()
-        fig_overall.add_trace(go.Histogram(
-            x=data_left['Overall'],
-            name=club_left,
-            opacity=0.7,
-            nbinsx=20,
-            marker_color='rgba(30, 60, 114, 0.7)'
-        ))
-        fig_overall.add_trace(go.Histogram(
-            x=data_right['Overall'],
-            name=club_right,
-            opacity=0.7,
-            nbinsx=20,
-            marker_color='rgba(220, 20, 60, 0.7)'
-        ))
-        fig_overall.update_layout(
-            title="Distribuição de Overall",
-            xaxis_title="Overall",
-            yaxis_title="Número de Jogadores",
-            barmode='overlay'
-        )
-        st.plotly_chart(fig_overall, use_container_width=True)
+        st.plotly_chart(distribution_chart(comparison.overall_distribution, "Distribuição de Overall", "Overall"),
+                        use_container_width=True)
     
     with col2:
-        # Distribuição de Idades
-        fig_age = go.Figure()
-        fig_age.add_trace(go.Histogram(
-            x=data_left['Age'],
-            name=club_left,
-            opacity=0.7,
-            nbinsx=15,
-            marker_color='rgba(30, 60, 114, 0.7)'
-        ))
-        fig_age.add_trace(go.Histogram(
-            x=data_right['Age'],
-            name=club_right,
-            opacity=0.7,
-            nbinsx=15,
-            marker_color='rgba(220, 20, 60, 0.7)'
-        ))
-        fig_age.update_layout(
-            title="Distribuição de Idades",
-            xaxis_title="Idade",
-            yaxis_title="Número de Jogadores",
-            barmode='overlay'
-        )
-        st.plotly_chart(fig_age, use_container_width=True)
+        st.plotly_chart(distribution_chart(comparison.age_distribution, "Distribuição de Idades", "Idade"),
+                        use_container_width=True)
+    
+    st.markdown("#### 📍 Overall Médio por Posição")
+    st.dataframe(comparison.positions.round(1).rename_axis('Posição'), use_container_width=True)
 
+def distribution_chart(distribution, title, axis_title):
+    """Histogramas pré-agrupados (intervalos x clubes): barras por clube, ou mapa de calor para muitos clubes"""
+    # plotly só é carregado quando um gráfico é desenhado
+    import plotly.graph_objects as go
+    if distribution.shape[1] <= MAX_GROUPED_CLUBS:
+        fig = go.Figure([
+            go.Bar(x=distribution.index, y=distribution[club], name=club, opacity=0.8)
+            for club in distribution.columns
+        ])
+        fig.update_layout(barmode='group', yaxis_title="Número de Jogadores")
+    else:
+        fig = go.Figure(go.Heatmap(z=distribution.T.to_numpy(), x=distribution.index, y=distribution.columns,
+                                   colorscale='Blues', colorbar=dict(title="Jogadores")))
+        fig.update_layout(height=max(400, 14 * distribution.shape[1]))
+    fig.update_layout(title=title, xaxis_title=axis_title)
+    return fig
+
+@st.fragment
+@timed()
 def show_player_analysis(df, club_left, club_right):
     """Análise individual de jogadores"""
     st.markdown("### 👤 Análise Individual de Jogadores")
@@ -291,44 +278,37 @@ def show_player_analysis(df, club_left, club_right):
     
     with col1:
         st.markdown(f"#### {club_left}")
-        players_left = df[df["Club"] == club_left]['Name'].tolist()
+        squad_left = get_club_players(df, club_left)
+        players_left = squad_left['Name'].tolist()
         selected_left = st.selectbox("Escolha um jogador:", players_left, key="player_left")
     
     with col2:
         st.markdown(f"#### {club_right}")
-        players_right = df[df["Club"] == club_right]['Name'].tolist()
+        squad_right = get_club_players(df, club_right)
+        players_right = squad_right['Name'].tolist()
         selected_right = st.selectbox("Escolha um jogador:", players_right, key="player_right")
     
     if selected_left and selected_right:
-        player_left = df[df['Name'] == selected_left].iloc[0]
-        player_right = df[df['Name'] == selected_right].iloc[0]
+        player_left = squad_left[squad_left['Name'] == selected_left].iloc[0]
+        player_right = squad_right[squad_right['Name'] == selected_right].iloc[0]
         
         st.markdown("---")
         st.markdown("### ⚖️ Comparação Direta")
         
+        # Fotos dos dois jogadores obtidas em paralelo
+        photo_left, photo_right = prefetch_player_photos(pd.DataFrame([player_left, player_right]), 120)
+        
         col1, col2, col3 = st.columns([1, 2, 1])
         
         with col1:
-            if hasattr(player_left, 'Photo') and pd.notna(player_left.Photo):
-                try:
-                    st.image(player_left.Photo, width=120)
-                except:
-                    st.markdown("📷")
-            else:
-                st.markdown("📷")
+            st.image(photo_left, width=120)
             st.markdown(f"**{player_left.Name}**")
-            st.caption(f"{club_left} | {extract_position(player_left.Position)}")
+            st.caption(f"{club_left} | {player_left.position_code}")
         
         with col3:
-            if hasattr(player_right, 'Photo') and pd.notna(player_right.Photo):
-                try:
-                    st.image(player_right.Photo, width=120)
-                except:
-                    st.markdown("📷")
-            else:
-                st.markdown("📷")
+            st.image(photo_right, width=120)
             st.markdown(f"**{player_right.Name}**")
-            st.caption(f"{club_right} | {extract_position(player_right.Position)}")
+            st.caption(f"{club_right} | {player_right.position_code}")
         
         with col2:
             # Comparação de stats
@@ -338,138 +318,370 @@ def show_player_analysis(df, club_left, club_right):
             }, index=['Overall', 'Potencial', 'Idade'])
             
             st.bar_chart(comparison_data)
+        
+        show_similar_players(df, [player_left, player_right], [club_left, club_right])
+
+def show_similar_players(df, players, clubs, key="similar"):
+    """Jogadores mais semelhantes (por atributos) aos jogadores selecionados (linhas do dataset)"""
+    st.markdown("---")
+    st.markdown("### 🔎 Jogadores Semelhantes")
+    
+    similarity_index = get_similarity_index(df)
+    if not similarity_index.available:
+        st.info("Estatísticas específicas não disponíveis no dataset")
+        return
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        max_age = st.slider("Idade Máxima", 16, 45, 45, key=f"{key}_max_age")
+    with col2:
+        value_limit = float(max(1, round(float(df['value_eur_m'].max()) + 0.5)))
+        max_value = st.slider("Valor Máximo (€M)", 0.0, value_limit, value_limit, step=0.5, key=f"{key}_max_value")
+    with col3:
+        exclude_own = st.checkbox("Excluir os clubes em análise", value=True, key=f"{key}_exclude")
+    
+    # Uma única consulta matricial para os dois jogadores
+    rows = df.index.get_indexer([player.name for player in players])
+    results = similarity_index.query(
+        rows,
+        k=5,
+        max_age=max_age,
+        max_value=max_value,
+        exclude_clubs=clubs if exclude_own else ()
+    )
+    
+    for column, player, result in zip(st.columns(len(players)), players, results):
+        with column:
+            st.markdown(f"#### Parecidos com {player.Name}")
+            if len(result.rows) == 0:
+                st.info("Nenhum jogador encontrado com os critérios selecionados.")
+                continue
+            similar = df.iloc[result.rows]
+            for score, match in zip(result.scores, similar.itertuples()):
+                st.markdown(
+                    f"**{match.Name}** ({match.Overall}) — {match.Club} | {match.position_code} | "
+                    f"{match.Age} anos | {match.Value} · semelhança {score * 100:.0f}%"
+                )
 
+@st.fragment
+@timed()
 def show_advanced_analytics(df, club_left, club_right):
     """Análises avançadas dos clubes"""
     st.markdown("### 📈 Análises Avançadas")
     
-    data_left = df[df["Club"] == club_left]
-    data_right = df[df["Club"] == club_right]
-    
     # Top jogadores
     col1, col2 = st.columns(2)
     
     with col1:
         st.markdown(f"#### 🌟 Top 5 Jogadores - {club_left}")
-        top_left = data_left.nlargest(5, 'Overall')[['Name', 'Overall', 'Age', 'Position', 'Value']]
-        for _, player in top_left.iterrows():
-            position = extract_position(player.Position)
-            rating_color = get_player_rating_color(player.Overall)
-            st.markdown(f"""
-            <div class="player-card">
-                <div style="display: flex; align-items: center;">
-                    <div style="background: {rating_color}; color: black; font-weight: bold; 
-                                padding: 0.3rem 0.6rem; border-radius: 8px; margin-right: 1rem; 
-                                min-width: 40px; text-align: center;">
-                        {player.Overall}
-                    </div>
-                    <div style="flex: 1; color: black;">
-                        <strong>{player.Name}</strong><br>
-                        <small>{position} | {player.Age} anos | {player.Value}</small>
-                    </div>
-                </div>
-            </div>
-            """, unsafe_allow_html=True)
+        show_player_cards(df, top_players(df, club_left, 5))
     
     with col2:
         st.markdown(f"#### 🌟 Top 5 Jogadores - {club_right}")
-        top_right = data_right.nlargest(5, 'Overall')[['Name', 'Overall', 'Age', 'Position', 'Value']]
-        for _, player in top_right.iterrows():
-            position = extract_position(player.Position)
-            rating_color = get_player_rating_color(player.Overall)
-            st.markdown(f"""
-            <div class="player-card">
-                <div style="display: flex; align-items: center;">
-                    <div style="background: {rating_color}; color: black; font-weight: bold; 
-                                padding: 0.3rem 0.6rem; border-radius: 8px; margin-right: 1rem; 
-                                min-width: 40px; text-align: center;">
-                        {player.Overall}
-                    </div>
-                    <div style="flex: 1; color: black;">
-                        <strong>{player.Name}</strong><br>
-                        <small>{position} | {player.Age} anos | {player.Value}</small>
-                    </div>
-                </div>
-            </div>
-            """, unsafe_allow_html=True)
+        show_player_cards(df, top_players(df, club_right, 5))
     
     # Análise por posição
     st.markdown("---")
     st.markdown("#### 📍 Força por Posição")
     
-    pos_left = data_left.groupby(data_left['Position'].apply(extract_position))['Overall'].mean()
-    pos_right = data_right.groupby(data_right['Position'].apply(extract_position))['Overall'].mean()
-    
-    df_positions = pd.DataFrame({
-        club_left: pos_left,
-        club_right: pos_right
-    }).fillna(0)
+    df_positions = position_strength(df, [club_left, club_right])
     
     st.bar_chart(df_positions)
+    
+    # Posição de cada clube no ranking da liga (matriz clube x posição pré-calculada)
+    st.markdown("#### 🏅 Ranking na Liga por Posição")
+    
+    col1, col2 = st.columns(2)
+    
+    for column, club in ((col1, club_left), (col2, club_right)):
+        with column:
+            ranking = position_ranking(df, club)
+            st.markdown(f"**{club}**")
+            st.dataframe(pd.DataFrame({
+                'Overall Médio': ranking['mean'].round(1),
+                'Melhor': ranking['max'].astype(int),
+                'Jogadores': ranking['count'],
+                'Ranking': ranking['rank'].astype(str) + "º de " + ranking['clubs'].astype(str),
+            }).rename_axis('Posição'), use_container_width=True)
 
+def set_scouting_page(page):
+    """Callback da paginação do scouting (corre antes da reexecução do fragmento)"""
+    st.session_state.scout_page = page
+
+@st.fragment
+@timed()
 def show_scouting_system(df, club_left, club_right):
     """Sistema de scouting para encontrar jogadores"""
     st.markdown("### 🎯 Sistema de Scouting")
     
+    scouting_index = get_scouting_index(df)
+    
     col1, col2, col3 = st.columns(3)
     
     with col1:
         min_overall = st.slider("Overall Mínimo", 60, 99, 75)
+        min_potential = st.slider("Potencial Mínimo", 60, 99, 60)
     
     with col2:
         max_age = st.slider("Idade Máxima", 16, 40, 28)
+        value_limit = float(max(1, round(scouting_index.max_value + 0.5)))
+        max_value = st.slider("Valor Máximo (€M)", 0.0, value_limit, value_limit, step=0.5)
     
     with col3:
         position_filter = st.selectbox(
             "Posição",
-            ["Todas"] + sorted(df['Position'].apply(extract_position).unique())
+            ["Todas"] + list_positions(df)
         )
     
-    # Filtrar jogadores
-    filtered_df = df[
-        (df['Overall'] >= min_overall) & 
-        (df['Age'] <= max_age) &
-        (~df['Club'].isin([club_left, club_right]))
-    ]
-    
-    if position_filter != "Todas":
-        filtered_df = filtered_df[filtered_df['Position'].apply(extract_position) == position_filter]
+    # Paginação: volta à primeira página sempre que os critérios mudam
+    scouting_query = (min_overall, min_potential, max_age, max_value, position_filter, club_left, club_right)
+    if st.session_state.get('scout_query') != scouting_query:
+        st.session_state.scout_query = scouting_query
+        st.session_state.scout_page = 0
+    page = st.session_state.scout_page
+    
+    # Filtrar jogadores (top-k sobre o índice pré-ordenado)
+    result = scouting_search(
+        df,
+        min_overall=min_overall,
+        max_age=max_age,
+        min_potential=min_potential,
+        max_value=max_value,
+        position=None if position_filter == "Todas" else position_filter,
+        exclude_clubs=[club_left, club_right],
+        page=page
+    )
     
     # Mostrar resultados
-    st.markdown(f"#### 🔍 Jogadores Encontrados ({len(filtered_df)})")
+    st.markdown(f"#### 🔍 Jogadores Encontrados ({result.total})")
     
-    if len(filtered_df) > 0:
-        # Top 10 jogadores
-        top_prospects = filtered_df.nlargest(10, 'Overall')
+    if result.total > 0:
+        first = page * PAGE_SIZE + 1
+        last = page * PAGE_SIZE + len(result.players)
+        st.caption(f"A mostrar {first}–{last} de {result.total} | consulta em {result.elapsed_ms:.2f} ms")
         
-        for _, player in top_prospects.iterrows():
-            col1, col2, col3, col4, col5 = st.columns([1, 3, 1, 1, 2])
-            
-            with col1:
-                if hasattr(player, 'Photo') and pd.notna(player.Photo):
-                    try:
-                        st.image(player.Photo, width=50)
-                    except:
-                        st.markdown("📷")
-                else:
-                    st.markdown("📷")
-            
-            with col2:
-                st.markdown(f"**{player.Name}**")
-                st.caption(f"{player.Club} | {extract_position(player.Position)}")
-            
-            with col3:
-                st.metric("Overall", player.Overall)
+        top_prospects = result.players
+        photos = prefetch_player_photos(top_prospects, 50)
+        
+        show_player_cards(df, top_prospects, variant="scout", photos=photos)
+        
+        col_prev, _, col_next = st.columns([1, 3, 1])
+        with col_prev:
+            if page > 0:
+                st.button(f"← {PAGE_SIZE} anteriores", key="scout_prev",
+                          on_click=set_scouting_page, args=(page - 1,))
+        with col_next:
+            if last < result.total:
+                st.button(f"Próximos {PAGE_SIZE} →", key="scout_next",
+                          on_click=set_scouting_page, args=(page + 1,))
+    else:
+        st.info("Nenhum jogador encontrado com os critérios selecionados.")
+
+@st.fragment
+@timed()
+def show_match_simulation(df, club_left, club_right):
+    """Simulação Monte Carlo do jogo entre os dois clubes e do campeonato completo"""
+    st.markdown("### ⚽ Simular Jogo")
+    
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        formation_left = st.selectbox(f"Formação - {club_left}", list(FORMATIONS), key="sim_formation_left")
+        formation_right = st.selectbox(f"Formação - {club_right}", list(FORMATIONS), key="sim_formation_right")
+    
+    with col2:
+        matches = st.select_slider("Jogos simulados", [10_000, 50_000, 100_000, 250_000, 500_000],
+                                   value=DEFAULT_MATCHES, key="sim_matches")
+        seed = st.number_input("Semente", min_value=0, value=DEFAULT_SEED, step=1, key="sim_seed")
+    
+    with col3:
+        home_advantage = st.checkbox(f"Jogo em casa do {club_left}", value=True, key="sim_home")
+    
+    # Ratings por setor dos onzes pré-calculados de cada formação
+    ratings_left = get_team_ratings(df, formation_left).loc[club_left]
+    ratings_right = get_team_ratings(df, formation_right).loc[club_right]
+    simulation = simulate_match(ratings_left, ratings_right, matches, int(seed), home_advantage)
+    
+    st.caption(f"{simulation.matches:,} jogos simulados em {simulation.elapsed_ms:.1f} ms")
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric(f"Vitória {club_left}", f"{simulation.home_win:.1%}")
+    with col2:
+        st.metric("Empate", f"{simulation.draw:.1%}")
+    with col3:
+        st.metric(f"Vitória {club_right}", f"{simulation.away_win:.1%}")
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.markdown("#### 🎯 Golos")
+        expected_left, expected_right = simulation.expected_goals
+        st.dataframe(pd.DataFrame({
+            'Ataque': [ratings_left['attack'], ratings_right['attack']],
+            'Defesa': [ratings_left['defence'], ratings_right['defence']],
+            'Golos Esperados': [expected_left, expected_right],
+            'Golos Médios': list(simulation.mean_goals),
+        }, index=[club_left, club_right]).round(2), use_container_width=True)
+        
+        likely = most_likely_scores(simulation)
+        st.markdown("#### 📋 Resultados Mais Prováveis")
+        st.dataframe(pd.DataFrame({
+            'Resultado': likely['score'],
+            'Probabilidade': (likely['probability'] * 100).round(1).astype(str) + "%",
+        }), hide_index=True, use_container_width=True)
+    
+    with col2:
+        st.markdown("#### 📊 Distribuição de Golos")
+        st.bar_chart(simulation.goal_distribution.rename(columns={'home': club_left, 'away': club_right}),
+                     stack=False)
+    
+    # Campeonato completo: todos contra todos, em casa e fora, num pool de processos
+    st.markdown("---")
+    st.markdown("#### 🏆 Campeonato Simulado")
+    st.caption(f"Todos os clubes contra todos, em casa e fora ({LEAGUE_MATCHES:,} jogos por confronto), "
+               f"com a formação {formation_left}")
+    
+    # O campeonato só é (re)simulado com um clique para cada combinação de parâmetros
+    league_params = (formation_left, int(seed), dataset_version(df))
+    if st.button("🏆 Simular Campeonato", key="sim_league"):
+        st.session_state.sim_league_params = league_params
+    simulated_params = st.session_state.get('sim_league_params')
+    if simulated_params is not None and simulated_params != league_params:
+        st.info("Os parâmetros mudaram: clique em Simular Campeonato para atualizar a classificação.")
+    elif simulated_params is not None:
+        with st.spinner("A simular o campeonato..."):
+            table = get_league_table(df, formation_left, seed=int(seed))
+        
+        col1, col2 = st.columns(2)
+        for column, club in ((col1, club_left), (col2, club_right)):
+            with column:
+                row = table.loc[club]
+                st.metric(club, f"{int(row['rank'])}º lugar", f"{row['points']:.1f} pontos esperados",
+                          delta_color="off")
+        
+        st.dataframe(pd.DataFrame({
+            'Pos': table['rank'],
+            'J': table['played'],
+            'V': table['wins'].round(1),
+            'E': table['draws'].round(1),
+            'D': table['losses'].round(1),
+            'GM': table['goals_for'].round(1),
+            'GS': table['goals_against'].round(1),
+            'DG': table['goal_difference'].round(1),
+            'Pts': table['points'].round(1),
+        }).rename_axis('Clube'), use_container_width=True)
+
+def apply_transfer(row, club):
+    """Callback das transferências (corre antes da reexecução do fragmento)"""
+    try:
+        st.session_state.transfer_sandbox.move(row, club)
+    except (KeyError, ValueError) as error:
+        st.session_state.transfer_error = str(error.args[0]) if error.args else str(error)
+
+def undo_transfer():
+    """Callback que anula a última transferência"""
+    st.session_state.transfer_sandbox.undo()
+
+@st.fragment
+@timed()
+def show_transfer_sandbox(df, club_left, club_right):
+    """Simulador de transferências: movimentos hipotéticos da sessão sobre o dataset partilhado"""
+    st.markdown("### 🔄 Simulador de Transferências")
+    
+    sandbox, skipped = get_transfer_sandbox(df)
+    if skipped:
+        st.warning(f"{len(skipped)} transferência(s) deixaram de ser possíveis com os dados atualizados.")
+    error = st.session_state.pop('transfer_error', None)
+    if error:
+        st.error(f"⚠️ {error}")
+    
+    def player_label(row):
+        position, overall = df['position_code'].iat[row], df['Overall'].iat[row]
+        return f"{df['Name'].iat[row]} ({sandbox.club_of(row)} | {position} | {overall})"
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.markdown("#### ➕ Contratar")
+        buyer = st.selectbox("Clube comprador", [club_left, club_right], key="transfer_buyer")
+        min_overall = st.slider("Overall Mínimo", 60, 99, 75, key="transfer_min_overall")
+        position_filter = st.selectbox("Posição", ["Todas"] + list_positions(df), key="transfer_position")
+        # Candidatos da lista de scouting (os que o sandbox já pôs no clube ficam de fora)
+        candidates = scouting_search(
+            df,
+            min_overall=min_overall,
+            position=None if position_filter == "Todas" else position_filter,
+            exclude_clubs=[buyer],
+            page_size=TRANSFER_CANDIDATES
+        ).players
+        rows = [row for row in df.index.get_indexer(candidates.index).tolist() if sandbox.club_of(row) != buyer]
+        signing = st.selectbox("Jogador", rows, index=None, format_func=player_label,
+                               placeholder="Escolha um jogador", key="transfer_signing")
+        st.button("✅ Contratar", key="transfer_sign", disabled=signing is None,
+                  on_click=apply_transfer, args=(signing, buyer))
+    
+    with col2:
+        st.markdown("#### ➖ Vender")
+        seller = st.selectbox("Clube vendedor", [club_left, club_right], key="transfer_seller")
+        squad = sorted(sandbox.members(seller).tolist(), key=lambda row: -df['Overall'].iat[row])
+        sale = st.selectbox("Jogador", squad, index=None, format_func=player_label,
+                            placeholder="Escolha um jogador", key="transfer_sale")
+        destinations = [club for club in list_clubs(df).index if club != seller]
+        destination = st.selectbox("Clube de destino", destinations, key="transfer_destination")
+        st.button("💸 Vender", key="transfer_sell", disabled=sale is None,
+                  on_click=apply_transfer, args=(sale, destination))
+    
+    # Transferências da sessão
+    st.markdown("---")
+    st.markdown(f"#### 📋 Transferências ({len(sandbox.transfers)})")
+    if sandbox.transfers:
+        st.dataframe(pd.DataFrame({
+            'Jogador': [transfer.name for transfer in sandbox.transfers],
+            'De': [transfer.from_club for transfer in sandbox.transfers],
+            'Para': [transfer.to_club for transfer in sandbox.transfers],
+        }), hide_index=True, use_container_width=True)
+        col_undo, col_reset, _ = st.columns([1, 1, 3])
+        with col_undo:
+            st.button("↩️ Desfazer", key="transfer_undo", on_click=undo_transfer)
+        with col_reset:
+            st.button("🗑️ Limpar", key="transfer_reset", on_click=reset_transfer_sandbox)
+        st.caption(f"{len(sandbox.changed_clubs())} clubes com o plantel alterado")
+    else:
+        st.info("Ainda não há transferências nesta sessão.")
+    
+    # Impacto nos dois clubes: somas correntes do sandbox comparadas com o resumo original
+    st.markdown("---")
+    st.markdown("#### 📈 Impacto nos Plantéis")
+    formation = st.selectbox("Formação", list(FORMATIONS), key="transfer_formation")
+    summary = list_clubs(df)
+    
+    col1, col2 = st.columns(2)
+    
+    for column, club in ((col1, club_left), (col2, club_right)):
+        with column:
+            st.markdown(f"**{club}**")
+            metrics = sandbox.club_metrics(club)
+            base = summary.loc[club]
+            metric_col1, metric_col2, metric_col3 = st.columns(3)
+            for metric_column, label, key, fmt in (
+                (metric_col1, "Overall Médio", 'overall_mean', "{:.1f}"),
+                (metric_col2, "Idade Média", 'age_mean', "{:.1f}"),
+                (metric_col3, "Potencial Médio", 'potential_mean', "{:.1f}"),
+                (metric_col1, "Jogadores", 'squad_size', "{:.0f}"),
+                (metric_col2, "Valor Total (€M)", 'value_total_m', "{:.1f}"),
+                (metric_col3, "Overall do Onze", 'xi_overall_mean', "{:.1f}"),
+            ):
+                with metric_column:
+                    change = metrics[key] - base[key]
+                    st.metric(label, fmt.format(metrics[key]), fmt.format(change) if abs(change) > 1e-9 else None,
+                              delta_color="inverse" if key == 'age_mean' else "normal")
             
-            with col4:
-                st.metric("Idade", player.Age)
+            strength = sandbox.position_strength(club)
+            st.dataframe(pd.DataFrame({
+                'Overall Médio': strength['mean'].round(1),
+                'Jogadores': strength['count'].astype(int),
+            }).rename_axis('Posição'), use_container_width=True)
             
-            with col5:
-                st.markdown(f"**Valor:** {player.Value}")
-                potential_growth = player.Potential - player.Overall
-                if potential_growth > 0:
-                    st.success(f"Potencial: +{potential_growth}")
-                else:
-                    st.info("Jogador experiente")
-    else:
-        st.info("Nenhum jogador encontrado com os critérios selecionados.")
\ No newline at end of file
+            xi = sandbox.starting_xi(club, formation)
+            show_player_cards(df, xi, variant="xi", roles=xi['slot_role'])
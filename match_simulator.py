@@ -0,0 +1,194 @@
+"""Simulação Monte Carlo de jogos a partir dos onzes iniciais (modelo de Poisson)
+
+Cada equipa tem um rating de ataque e de defesa calculado a partir dos jogadores
+do onze por setor. Os golos de cada equipa num jogo seguem uma distribuição de
+Poisson, cuja média cresce exponencialmente com a diferença entre o ataque da
+equipa e a defesa do adversário. Todos os jogos de uma simulação são sorteados de
+uma só vez com NumPy e uma semente fixa, para o resultado ser reprodutível.
+"""
+import multiprocessing
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+import streamlit as st
+from lineup import DEFAULT_FORMATION, FORMATIONS, get_all_lineups
+from utils import dataset_version
+
+DEFAULT_MATCHES = 100_000
+DEFAULT_SEED = 42
+# Jogos sorteados por confronto no campeonato completo (cada par joga em casa e fora)
+LEAGUE_MATCHES = 1_000
+LEAGUE_WORKERS = int(os.environ.get("FOOTDATA_SIM_WORKERS", os.cpu_count() or 1))
+
+# Média de golos de uma equipa frente a um adversário igual, e efeito de cada ponto de diferença
+BASE_GOALS = 1.35
+GOAL_SENSITIVITY = 0.07
+HOME_ADVANTAGE = 1.15
+# Resultados com mais golos do que isto entram na última linha/coluna da tabela de resultados
+MAX_GOALS = 6
+
+# Setor de cada função do onze e peso do meio-campo no ataque e na defesa
+ROLE_LINES = {
+    "GK": "defence", "CB": "defence", "LB": "defence", "RB": "defence",
+    "DM": "midfield", "CM": "midfield", "LM": "midfield", "RM": "midfield",
+    "AM": "attack", "LW": "attack", "RW": "attack", "ST": "attack",
+}
+MIDFIELD_WEIGHT = 0.3
+# Rating atribuído a um lugar que o plantel não consegue preencher
+MISSING_SLOT_RATING = 40.0
+
+MatchSimulation = namedtuple('MatchSimulation', [
+    'home_win', 'draw', 'away_win', 'expected_goals', 'mean_goals', 'scores', 'goal_distribution',
+    'matches', 'elapsed_ms'
+])
+
+def _team_ratings(df, formation):
+    # Média do Overall por setor para o onze de cada clube (lugares vazios com MISSING_SLOT_RATING)
+    lineups = get_all_lineups(df, formation)
+    lines = np.array([ROLE_LINES[role] for role, _, _ in FORMATIONS[formation]])
+    clubs = list(lineups)
+    rows = np.array([lineups[club] for club in clubs]).reshape(len(clubs), len(lines))
+    overall = df['Overall'].to_numpy(dtype='float64')
+    slots = np.where(rows >= 0, overall[np.maximum(rows, 0)], MISSING_SLOT_RATING)
+
+    sectors = {line: slots[:, lines == line].mean(axis=1) for line in ("attack", "midfield", "defence")}
+    ratings = pd.DataFrame({
+        'attack': (1 - MIDFIELD_WEIGHT) * sectors['attack'] + MIDFIELD_WEIGHT * sectors['midfield'],
+        'defence': (1 - MIDFIELD_WEIGHT) * sectors['defence'] + MIDFIELD_WEIGHT * sectors['midfield'],
+        'overall': slots.mean(axis=1),
+    }, index=pd.Index(clubs, dtype=object, name='Club'))
+    return ratings.sort_index()
+
+@st.cache_resource(show_spinner=False, max_entries=2 * len(FORMATIONS))
+def _build_team_ratings(_df, formation, version):
+    return _team_ratings(_df, formation)
+
+def get_team_ratings(df, formation=DEFAULT_FORMATION):
+    """Ratings de ataque, defesa e global do onze de cada clube (em cache por versão do dataset)"""
+    return _build_team_ratings(df, formation, dataset_version(df))
+
+def expected_goals(attack, defence, home=False):
+    """Média de golos de uma equipa com este ataque contra esta defesa (vetorizado)"""
+    goals = BASE_GOALS * np.exp(GOAL_SENSITIVITY * (np.asarray(attack) - np.asarray(defence)))
+    return goals * HOME_ADVANTAGE if home else goals
+
+def simulate_match(home, away, matches=DEFAULT_MATCHES, seed=DEFAULT_SEED, home_advantage=True):
+    """Simula `matches` jogos entre dois clubes (linhas de get_team_ratings)
+
+    Devolve as probabilidades de vitória/empate/derrota da equipa da casa, os golos
+    esperados e médios, os resultados mais prováveis e a distribuição de golos.
+    """
+    start = time.perf_counter()
+    rates = np.array([
+        expected_goals(home['attack'], away['defence'], home=home_advantage),
+        expected_goals(away['attack'], home['defence']),
+    ])
+    goals = np.random.default_rng(seed).poisson(rates, size=(matches, 2))
+    home_goals, away_goals = goals[:, 0], goals[:, 1]
+
+    # Tabela de resultados (golos da casa x golos de fora), com MAX_GOALS+ na última posição
+    capped = np.minimum(goals, MAX_GOALS)
+    table = np.bincount(capped[:, 0] * (MAX_GOALS + 1) + capped[:, 1],
+                        minlength=(MAX_GOALS + 1) ** 2).reshape(MAX_GOALS + 1, MAX_GOALS + 1)
+    labels = [str(n) for n in range(MAX_GOALS)] + [f"{MAX_GOALS}+"]
+    scores = pd.DataFrame(table / matches, index=pd.Index(labels, name='home'),
+                          columns=pd.Index(labels, name='away'))
+    distribution = pd.DataFrame({
+        'home': np.bincount(capped[:, 0], minlength=MAX_GOALS + 1) / matches,
+        'away': np.bincount(capped[:, 1], minlength=MAX_GOALS + 1) / matches,
+    }, index=pd.Index(labels, name='goals'))
+
+    return MatchSimulation(
+        home_win=float(np.mean(home_goals > away_goals)),
+        draw=float(np.mean(home_goals == away_goals)),
+        away_win=float(np.mean(home_goals < away_goals)),
+        expected_goals=(float(rates[0]), float(rates[1])),
+        mean_goals=(float(home_goals.mean()), float(away_goals.mean())),
+        scores=scores,
+        goal_distribution=distribution,
+        matches=matches,
+        elapsed_ms=(time.perf_counter() - start) * 1000
+    )
+
+def most_likely_scores(simulation, n=5):
+    """Os n resultados mais prováveis de uma simulação: DataFrame com 'score' e 'probability'"""
+    stacked = simulation.scores.stack()
+    top = stacked.nlargest(n)
+    return pd.DataFrame({
+        'score': [f"{home}-{away}" for home, away in top.index],
+        'probability': top.to_numpy(),
+    })
+
+def _simulate_home_fixtures(attack, defence, home_clubs, matches, seed):
+    # Corre num processo do pool: todos os jogos em casa dos clubes indicados contra todos os outros.
+    # Cada clube da casa tem a sua semente, para o resultado não depender da divisão pelos processos.
+    n_clubs = len(attack)
+    results = []
+    for home in home_clubs:
+        rng = np.random.default_rng([seed, home])
+        rates_home = expected_goals(attack[home], defence, home=True)
+        rates_away = expected_goals(attack, defence[home])
+        home_goals = rng.poisson(rates_home[:, None], size=(n_clubs, matches))
+        away_goals = rng.poisson(rates_away[:, None], size=(n_clubs, matches))
+        row = np.stack([
+            np.mean(home_goals > away_goals, axis=1),
+            np.mean(home_goals == away_goals, axis=1),
+            np.mean(home_goals < away_goals, axis=1),
+            home_goals.mean(axis=1),
+            away_goals.mean(axis=1),
+        ])
+        row[:, home] = 0  # um clube não joga contra si próprio
+        results.append(row)
+    return home_clubs, results
+
+def simulate_league(ratings, matches=LEAGUE_MATCHES, seed=DEFAULT_SEED, workers=LEAGUE_WORKERS):
+    """Campeonato completo (todos contra todos, em casa e fora) simulado num pool de processos
+
+    Devolve a classificação esperada: vitórias, empates, derrotas, golos e pontos
+    médios por clube, ordenada por pontos e diferença de golos.
+    """
+    attack = ratings['attack'].to_numpy(dtype='float64')
+    defence = ratings['defence'].to_numpy(dtype='float64')
+    n_clubs = len(ratings)
+    # (home_win, draw, away_win, golos da casa, golos de fora) para cada par casa x fora
+    fixtures = np.zeros((5, n_clubs, n_clubs))
+    chunks = [list(chunk) for chunk in np.array_split(np.arange(n_clubs), max(1, workers) * 4) if len(chunk)]
+
+    if workers <= 1:
+        outputs = [_simulate_home_fixtures(attack, defence, chunk, matches, seed) for chunk in chunks]
+    else:
+        # spawn: o processo da app tem threads (recarregamento, API) que não devem ser copiadas por fork
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            outputs = list(pool.map(_simulate_home_fixtures, *zip(*[
+                (attack, defence, chunk, matches, seed) for chunk in chunks
+            ])))
+    for home_clubs, rows in outputs:
+        for home, row in zip(home_clubs, rows):
+            fixtures[:, home, :] = row
+
+    home_win, draw, away_win, home_goals, away_goals = fixtures
+    table = pd.DataFrame({
+        'played': np.full(n_clubs, 2 * (n_clubs - 1)),
+        'wins': home_win.sum(axis=1) + away_win.sum(axis=0),
+        'draws': draw.sum(axis=1) + draw.sum(axis=0),
+        'losses': away_win.sum(axis=1) + home_win.sum(axis=0),
+        'goals_for': home_goals.sum(axis=1) + away_goals.sum(axis=0),
+        'goals_against': away_goals.sum(axis=1) + home_goals.sum(axis=0),
+    }, index=ratings.index)
+    table['goal_difference'] = table['goals_for'] - table['goals_against']
+    table['points'] = 3 * table['wins'] + table['draws']
+    table = table.sort_values(['points', 'goal_difference'], ascending=False)
+    table.insert(0, 'rank', np.arange(1, n_clubs + 1))
+    return table
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _build_league_table(_df, formation, matches, seed, version):
+    return simulate_league(get_team_ratings(_df, formation), matches, seed)
+
+def get_league_table(df, formation=DEFAULT_FORMATION, matches=LEAGUE_MATCHES, seed=DEFAULT_SEED):
+    """Classificação esperada do campeonato completo (em cache por versão do dataset e parâmetros)"""
+    return _build_league_table(df, formation, matches, seed, dataset_version(df))
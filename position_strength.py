@@ -0,0 +1,76 @@
+"""Matriz clube x posição (Overall médio, máximo e nº de jogadores) com rankings na liga"""
+import numpy as np
+import pandas as pd
+import streamlit as st
+from utils import dataset_version
+
+class PositionStrength:
+    """Força de todos os clubes em todas as posições, calculada numa só passagem
+
+    mean/max/count são DataFrames clubes x posições; rank ordena os clubes em cada
+    posição pelo Overall médio (1 = melhor, NaN se o clube não tem jogadores nessa posição).
+    """
+
+    def __init__(self, df):
+        clubs = df['Club'].cat
+        positions = df['position_code'].cat
+        n_positions = len(positions.categories)
+        cells = len(clubs.categories) * n_positions
+        flat = clubs.codes.to_numpy().astype('int64') * n_positions + positions.codes.to_numpy()
+        overall = df['Overall'].to_numpy(dtype='float64')
+
+        count = np.bincount(flat, minlength=cells)
+        total = np.bincount(flat, weights=overall, minlength=cells)
+        best = np.full(cells, np.nan)
+        np.fmax.at(best, flat, overall)  # fmax ignora o NaN inicial
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = total / count
+
+        shape = (len(clubs.categories), n_positions)
+        index = pd.Index(clubs.categories.astype(object), name='Club')
+        columns = pd.Index(positions.categories.astype(object), name='position_code')
+        self.count = pd.DataFrame(count.reshape(shape), index=index, columns=columns)
+        self.mean = pd.DataFrame(mean.reshape(shape), index=index, columns=columns)
+        self.max = pd.DataFrame(best.reshape(shape), index=index, columns=columns)
+
+        # Clubes sem jogadores (categorias vazias) ficam de fora
+        present = self.count.sum(axis=1) > 0
+        self.count, self.mean, self.max = self.count[present], self.mean[present], self.max[present]
+        self.rank = self.mean.rank(ascending=False, method='min')
+        self.ranked_clubs = self.count.gt(0).sum()
+
+    def for_clubs(self, clubs, stat='mean'):
+        """Estatística por posição (linhas) para cada clube (colunas), só nas posições com jogadores"""
+        table = getattr(self, stat).loc[list(clubs)].T
+        return table.dropna(how='all')
+
+    def club_ranking(self, club):
+        """Tabela por posição do clube: média, máximo, nº de jogadores, ranking e nº de clubes no ranking"""
+        has_players = self.count.loc[club] > 0
+        table = pd.DataFrame({
+            'mean': self.mean.loc[club],
+            'max': self.max.loc[club],
+            'count': self.count.loc[club],
+            'rank': self.rank.loc[club],
+            'clubs': self.ranked_clubs,
+        })[has_players]
+        return table.astype({'count': 'int64', 'rank': 'int64', 'clubs': 'int64'})
+
+    def leaders(self, position, n=10):
+        """Os n clubes mais fortes numa posição (por Overall médio)"""
+        table = pd.DataFrame({
+            'mean': self.mean[position],
+            'max': self.max[position],
+            'count': self.count[position],
+            'rank': self.rank[position],
+        }).dropna(subset=['rank'])
+        return table.sort_values(['rank', 'max'], ascending=[True, False]).head(n).astype(
+            {'count': 'int64', 'rank': 'int64'})
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def _build_position_strength(_df, version):
+    return PositionStrength(_df)
+
+def get_position_strength(df):
+    """Matriz clube x posição do dataset, construída uma vez por versão"""
+    return _build_position_strength(df, dataset_version(df))
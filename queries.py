@@ -0,0 +1,127 @@
+"""Camada de consultas independente da interface, partilhada pela app Streamlit e pela API HTTP
+
+As funções recebem o snapshot do dataset e devolvem objetos pandas (ou tuplos
+com eles); as caches e índices por versão do dataset são os mesmos da app.
+Um clube desconhecido dá KeyError e um critério inválido dá ValueError.
+"""
+from collections import namedtuple
+from club_distributions import get_club_distributions
+from lineup import DEFAULT_FORMATION, FORMATIONS, get_starting_xi
+from position_strength import get_position_strength
+from scouting import PAGE_SIZE, get_scouting_index
+from utils import get_club_players, get_club_summary
+
+# Colunas de um jogador devolvidas pelas consultas
+PLAYER_COLUMNS = ['ID', 'Name', 'Club', 'Age', 'Overall', 'Potential', 'position_code', 'Value', 'value_eur_m',
+                  'Photo']
+
+# Métricas de clube comparadas no frente-a-frente
+COMPARISON_METRICS = ['overall_mean', 'age_mean', 'potential_mean', 'squad_size', 'value_total_m', 'xi_overall_mean']
+
+HeadToHead = namedtuple('HeadToHead', ['left', 'right', 'difference'])
+ScoutingPage = namedtuple('ScoutingPage', ['players', 'total', 'page', 'elapsed_ms'])
+ClubComparison = namedtuple('ClubComparison', ['metrics', 'deltas', 'overall_distribution', 'age_distribution',
+                                               'positions'])
+
+def player_columns(players, extra=()):
+    """Colunas de jogador presentes no DataFrame (mais as pedidas), pela ordem de PLAYER_COLUMNS"""
+    return players[[column for column in [*PLAYER_COLUMNS, *extra] if column in players.columns]]
+
+def _require_club(df, club):
+    summary = get_club_summary(df)
+    if club not in summary.index:
+        raise KeyError(f"Clube desconhecido: {club}")
+    return summary.loc[club]
+
+def list_clubs(df):
+    """Resumo de todos os clubes, ordenado por Overall médio"""
+    return get_club_summary(df)
+
+def club_summary(df, club):
+    """Linha do resumo de um clube"""
+    return _require_club(df, club)
+
+def head_to_head(df, club_left, club_right):
+    """Métricas dos dois clubes e a diferença (esquerda - direita)"""
+    left = _require_club(df, club_left)
+    right = _require_club(df, club_right)
+    difference = left[COMPARISON_METRICS].astype(float) - right[COMPARISON_METRICS].astype(float)
+    return HeadToHead(left, right, difference)
+
+def compare_clubs(df, clubs):
+    """Comparação de N clubes a partir das tabelas pré-calculadas para todos os clubes
+
+    metrics: métricas de COMPARISON_METRICS por clube; deltas: diferença para a média
+    dos clubes escolhidos; distribuições de Overall/Idade por intervalo (intervalos x
+    clubes); positions: Overall médio por posição (posições x clubes).
+    """
+    clubs = list(dict.fromkeys(clubs))
+    if not clubs:
+        raise ValueError("Nenhum clube escolhido")
+    summary = get_club_summary(df)
+    missing = [club for club in clubs if club not in summary.index]
+    if missing:
+        raise KeyError(f"Clube desconhecido: {missing[0]}")
+    metrics = summary.loc[clubs, COMPARISON_METRICS].astype(float)
+    distributions = get_club_distributions(df)
+    return ClubComparison(
+        metrics=metrics,
+        deltas=metrics - metrics.mean(),
+        overall_distribution=distributions.for_clubs(clubs, 'overall'),
+        age_distribution=distributions.for_clubs(clubs, 'age'),
+        positions=get_position_strength(df).for_clubs(clubs)
+    )
+
+def club_players(df, club):
+    """Plantel de um clube"""
+    _require_club(df, club)
+    return get_club_players(df, club)
+
+def top_players(df, club, n=5):
+    """Os n melhores jogadores do clube por Overall"""
+    return club_players(df, club).nlargest(n, 'Overall')
+
+def starting_xi(df, club, formation=DEFAULT_FORMATION):
+    """Onze inicial do clube na formação, com a função e a posição de cada lugar"""
+    _require_club(df, club)
+    if formation not in FORMATIONS:
+        raise ValueError(f"Formação desconhecida: {formation}")
+    return get_starting_xi(df, club, formation)
+
+def position_strength(df, clubs):
+    """Overall médio por posição (linhas) para cada clube (colunas); 0 onde o clube não tem jogadores"""
+    clubs = list(dict.fromkeys(clubs))
+    for club in clubs:
+        _require_club(df, club)
+    return get_position_strength(df).for_clubs(clubs).fillna(0)
+
+def position_ranking(df, club):
+    """Por posição do clube: Overall médio e máximo, nº de jogadores e ranking entre os clubes da liga"""
+    _require_club(df, club)
+    return get_position_strength(df).club_ranking(club)
+
+def position_leaders(df, position, n=10):
+    """Os n clubes mais fortes numa posição"""
+    if n < 1:
+        raise ValueError(f"Número de clubes inválido: {n}")
+    strength = get_position_strength(df)
+    if position not in strength.mean.columns:
+        raise KeyError(f"Posição desconhecida: {position}")
+    return strength.leaders(position, n)
+
+def scouting_search(df, min_overall=0, min_potential=None, max_age=None, max_value=None, position=None,
+                    exclude_clubs=(), page=0, page_size=PAGE_SIZE):
+    """Pesquisa de scouting paginada (melhores primeiro): jogadores da página, total e tempo da consulta"""
+    if page < 0 or page_size <= 0:
+        raise ValueError("Página inválida")
+    result = get_scouting_index(df).query(
+        min_overall=min_overall,
+        max_age=max_age,
+        min_potential=min_potential,
+        max_value=max_value,
+        position=position,
+        exclude_clubs=exclude_clubs,
+        offset=page * page_size,
+        limit=page_size
+    )
+    return ScoutingPage(df.iloc[result.rows], result.total, page, result.elapsed_ms)
@@ -0,0 +1,110 @@
+"""Motor de scouting: índices pré-ordenados por Overall com pesquisa top-k paginada"""
+import time
+from collections import namedtuple
+import numpy as np
+import pandas as pd
+import streamlit as st
+from utils import dataset_version
+
+PAGE_SIZE = 10
+
+# Tamanho dos blocos percorridos quando não é preciso contar todos os resultados
+SCAN_CHUNK = 4096
+
+ScoutingResult = namedtuple('ScoutingResult', ['rows', 'total', 'elapsed_ms'])
+
+class ScoutingIndex:
+    """Colunas do dataset em arrays NumPy ordenados por Overall (desc), com uma lista por posição
+
+    A ordem é estável (desempate pela ordem original das linhas), pelo que a
+    paginação devolve sempre os mesmos jogadores para a mesma consulta.
+    """
+
+    def __init__(self, df):
+        overall = df['Overall'].to_numpy(dtype='float64')
+        order = np.lexsort((np.arange(len(df)), -overall))
+
+        self.rows = order
+        self.overall = overall[order]
+        self.neg_overall = -self.overall
+        self.age = df['Age'].to_numpy(dtype='float64')[order]
+        self.potential = df['Potential'].to_numpy(dtype='float64')[order]
+        self.value = df['value_eur_m'].to_numpy(dtype='float64')[order]
+
+        clubs = pd.Categorical(df['Club'])
+        self.club_categories = clubs.categories
+        self.club_codes = clubs.codes[order]
+
+        positions = df['position_code'].cat
+        position_codes = positions.codes[order]
+        self.all_slots = np.arange(len(order))
+        self.by_position = {
+            position: np.flatnonzero(position_codes == code)
+            for code, position in enumerate(positions.categories)
+        }
+        self.neg_overall_by_position = {
+            position: self.neg_overall[slots] for position, slots in self.by_position.items()
+        }
+        self.max_value = float(self.value.max()) if len(order) else 0.0
+
+    def _candidates(self, position, min_overall):
+        # Posições (no array ordenado) dos jogadores com Overall >= mínimo: é sempre um prefixo
+        if position is None:
+            slots, neg_overall = self.all_slots, self.neg_overall
+        elif position in self.by_position:
+            slots, neg_overall = self.by_position[position], self.neg_overall_by_position[position]
+        else:
+            return self.all_slots[:0]
+        return slots[:np.searchsorted(neg_overall, -min_overall, side='right')]
+
+    def query(self, min_overall=0, max_age=None, min_potential=None, max_value=None,
+              position=None, exclude_clubs=(), offset=0, limit=PAGE_SIZE, count_total=True):
+        """Pesquisa multi-critério; devolve as posições (iloc) da página pedida, o total e o tempo em ms
+
+        Com count_total=False a pesquisa pára assim que a página está preenchida,
+        e o total devolvido é None.
+        """
+        start = time.perf_counter()
+        candidates = self._candidates(position, min_overall)
+        excluded = self.club_categories.get_indexer(list(exclude_clubs))
+        excluded = excluded[excluded >= 0]
+
+        def matches(slots):
+            mask = np.ones(len(slots), dtype=bool)
+            if max_age is not None:
+                mask &= self.age[slots] <= max_age
+            if min_potential is not None:
+                mask &= self.potential[slots] >= min_potential
+            if max_value is not None:
+                mask &= self.value[slots] <= max_value
+            if len(excluded):
+                mask &= ~np.isin(self.club_codes[slots], excluded)
+            return slots[mask]
+
+        wanted = offset + limit
+        if count_total:
+            hits = matches(candidates)
+            total = len(hits)
+        else:
+            found = []
+            n_found = 0
+            for chunk_start in range(0, len(candidates), SCAN_CHUNK):
+                chunk_hits = matches(candidates[chunk_start:chunk_start + SCAN_CHUNK])
+                found.append(chunk_hits)
+                n_found += len(chunk_hits)
+                if n_found >= wanted:
+                    break
+            hits = np.concatenate(found) if found else candidates[:0]
+            total = None
+
+        rows = self.rows[hits[offset:wanted]]
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        return ScoutingResult(rows, total, elapsed_ms)
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def _build_scouting_index(_df, version):
+    return ScoutingIndex(_df)
+
+def get_scouting_index(df):
+    """Índice de scouting do dataset, construído uma vez por versão"""
+    return _build_scouting_index(df, dataset_version(df))
@@ -0,0 +1,93 @@
+"""Pesquisa de jogadores semelhantes por vetores de atributos (Pace, Shooting, ...)"""
+from collections import namedtuple
+import numpy as np
+import pandas as pd
+import streamlit as st
+from utils import STAT_COLUMNS, dataset_version
+
+SimilarPlayers = namedtuple('SimilarPlayers', ['rows', 'scores'])
+
+class SimilarityIndex:
+    """Matriz normalizada dos atributos de todos os jogadores
+
+    Cada atributo é padronizado (z-score) e cada linha normalizada para norma 1,
+    de modo que a semelhança entre dois jogadores é o produto interno (cosseno)
+    dos seus vetores. Jogadores sem todos os atributos ficam fora do índice.
+    """
+
+    def __init__(self, df):
+        self.columns = [column for column in STAT_COLUMNS if column in df.columns]
+        values = df[self.columns].to_numpy(dtype='float32', na_value=np.nan)
+        self.valid = ~np.isnan(values).any(axis=1) if self.columns else np.zeros(len(df), dtype=bool)
+
+        vectors = np.zeros((len(df), len(self.columns)), dtype='float32')
+        if self.valid.any():
+            valid_values = values[self.valid]
+            std = valid_values.std(axis=0)
+            std[std == 0] = 1
+            z = (valid_values - valid_values.mean(axis=0)) / std
+            norms = np.linalg.norm(z, axis=1, keepdims=True)
+            norms[norms == 0] = 1
+            vectors[self.valid] = z / norms
+        self.vectors = vectors
+
+        self.age = df['Age'].to_numpy(dtype='float64')
+        self.value = df['value_eur_m'].to_numpy(dtype='float64')
+        clubs = pd.Categorical(df['Club'])
+        self.club_categories = clubs.categories
+        self.club_codes = clubs.codes
+
+    @property
+    def available(self):
+        return bool(self.columns) and bool(self.valid.any())
+
+    def candidate_mask(self, max_age=None, max_value=None, exclude_clubs=()):
+        """Máscara dos jogadores que podem ser sugeridos"""
+        mask = self.valid.copy()
+        if max_age is not None:
+            mask &= self.age <= max_age
+        if max_value is not None:
+            mask &= self.value <= max_value
+        excluded = self.club_categories.get_indexer(list(exclude_clubs))
+        excluded = excluded[excluded >= 0]
+        if len(excluded):
+            mask &= ~np.isin(self.club_codes, excluded)
+        return mask
+
+    def query(self, rows, k=10, max_age=None, max_value=None, exclude_clubs=()):
+        """Os k jogadores mais semelhantes a cada jogador em `rows` (posições iloc), numa só operação matricial
+
+        Devolve uma lista (uma entrada por jogador pedido) de SimilarPlayers com as
+        posições iloc e a semelhança (cosseno) por ordem decrescente.
+        """
+        rows = np.asarray(rows, dtype='int64')
+        mask = self.candidate_mask(max_age, max_value, exclude_clubs)
+        candidates = np.flatnonzero(mask)
+        if len(rows) == 0 or len(candidates) == 0:
+            return [SimilarPlayers(candidates[:0], np.zeros(0, dtype='float32')) for _ in rows]
+
+        scores = self.vectors[rows] @ self.vectors[candidates].T
+        # O próprio jogador nunca é sugerido
+        scores[candidates[None, :] == rows[:, None]] = -np.inf
+        scores[~self.valid[rows]] = -np.inf
+
+        k = min(k, len(candidates))
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind='stable')
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+
+        results = []
+        for player_top, player_scores in zip(top, top_scores):
+            keep = np.isfinite(player_scores)
+            results.append(SimilarPlayers(candidates[player_top[keep]], player_scores[keep]))
+        return results
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def _build_similarity_index(_df, version):
+    return SimilarityIndex(_df)
+
+def get_similarity_index(df):
+    """Índice de semelhança do dataset, construído uma vez por versão"""
+    return _build_similarity_index(df, dataset_version(df))
@@ -0,0 +1,57 @@
+"""API JSON contra um dataset sintético: validação dos parâmetros e arranque embebido"""
+import json
+import socket
+from urllib.error import HTTPError
+from urllib.parse import quote
+from urllib.request import urlopen
+
+import pytest
+
+import api
+from benchmarks.generate_dataset import generate_players
+from live_data import LiveDataset
+
+@pytest.fixture(scope='module')
+def base_url(tmp_path_factory):
+    path = tmp_path_factory.mktemp("api") / "players.csv"
+    generate_players(2000, invalid_fraction=0).to_csv(path, index=False)
+    live = LiveDataset(str(path))
+    server = api.make_server('127.0.0.1', 0, dataset=lambda: live.current, workers=2)
+    api.serve_in_background(server)
+    yield f"http://127.0.0.1:{server.server_address[1]}", live.current
+    server.shutdown()
+    server.server_close()
+
+def get(url):
+    try:
+        with urlopen(url, timeout=10) as response:
+            return response.status, json.loads(response.read())
+    except HTTPError as error:
+        return error.code, json.loads(error.read())
+
+def test_repeated_clubs_are_compared_once(base_url):
+    url, df = base_url
+    club = quote(str(df['Club'].iloc[0]))
+    status, payload = get(f"{url}/position-strength?club={club}&club={club}")
+    assert status == 200
+    assert list(payload['clubs']) == [str(df['Club'].iloc[0])]
+
+@pytest.mark.parametrize('query', ["/position-leaders?position=CB&n=-3", "/position-leaders?position=CB&n=0",
+                                   "/scouting?page_size=201"])
+def test_invalid_sizes_are_rejected(base_url, query):
+    url, _ = base_url
+    status, payload = get(url + query)
+    assert status == 400
+    assert 'error' in payload
+
+def test_embedded_api_survives_a_busy_port(monkeypatch):
+    with socket.socket() as busy:
+        busy.bind(('127.0.0.1', 0))
+        busy.listen()
+        monkeypatch.setattr(api, 'API_HOST', '127.0.0.1')
+        monkeypatch.setattr(api, 'API_PORT', str(busy.getsockname()[1]))
+        api.start_embedded_api.clear()
+        try:
+            assert api.start_embedded_api() is None
+        finally:
+            api.start_embedded_api.clear()
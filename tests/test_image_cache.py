@@ -0,0 +1,95 @@
+"""Cache de imagens contra um servidor HTTP local (http.server) em vez das URLs reais"""
+import functools
+import os
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+
+import pytest
+from PIL import Image
+
+import image_cache
+from image_cache import DiskImageCache, get_thumbnail, placeholder_image, prefetch_thumbnails
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def image_server(tmp_path):
+    # Serve uma foto 200x100 em /photo.png; qualquer outro caminho dá 404
+    root = tmp_path / "www"
+    root.mkdir()
+    Image.new('RGB', (200, 100), (200, 30, 30)).save(root / "photo.png")
+    server = ThreadingHTTPServer(('127.0.0.1', 0), functools.partial(QuietHandler, directory=str(root)))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}", root
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def disk_cache(tmp_path, monkeypatch):
+    # Cache do processo apontada para uma pasta temporária, sem falhas memorizadas de outros testes
+    cache = DiskImageCache(str(tmp_path / "cache"))
+    monkeypatch.setattr(image_cache, '_cache', cache)
+    monkeypatch.setattr(image_cache, '_failures', {})
+    return cache
+
+def _set_times(cache, key, atime=None, mtime=None):
+    path = cache._path(key)
+    stat = os.stat(path)
+    os.utime(path, (atime or stat.st_atime, mtime or stat.st_mtime))
+
+def test_eviction_removes_least_recently_read_entries(tmp_path):
+    cache = DiskImageCache(str(tmp_path), max_bytes=300)
+    for key in ("a", "b", "c"):
+        cache.put(key, b"x" * 100)
+    # Ordem de acesso antiga a < b < c; ler "a" passa-o para o mais recente
+    for age, key in ((300, "a"), (200, "b"), (100, "c")):
+        _set_times(cache, key, atime=time.time() - age)
+    assert cache.get("a") is not None
+
+    cache.put("d", b"x" * 100)  # 400 bytes: remove por atime até ficar abaixo de 270
+    assert cache.get("b") is None
+    assert cache.get("c") is None
+    assert cache.get("a") is not None
+    assert cache.get("d") is not None
+
+def test_entries_older_than_max_age_expire_by_mtime(tmp_path):
+    cache = DiskImageCache(str(tmp_path), max_age=60)
+    cache.put("old", b"old")
+    cache.put("new", b"new")
+    # Lida há pouco (atime recente), mas obtida há mais tempo do que max_age
+    _set_times(cache, "old", atime=time.time(), mtime=time.time() - 120)
+
+    assert cache.get("old") is None
+    assert not os.path.exists(cache._path("old"))
+    assert cache.get("new") == b"new"
+
+def test_thumbnail_is_resized_and_served_from_cache(image_server, disk_cache):
+    base_url, root = image_server
+    url = f"{base_url}/photo.png"
+
+    data = get_thumbnail(url, 50)
+    assert Image.open(BytesIO(data)).size == (50, 25)
+    # Sem ampliar quando a imagem já é mais estreita do que a largura pedida
+    assert Image.open(BytesIO(get_thumbnail(url, 400))).size == (200, 100)
+
+    os.remove(root / "photo.png")
+    assert get_thumbnail(url, 50) == data
+
+def test_failed_and_invalid_urls_get_the_placeholder(image_server, disk_cache):
+    base_url, _ = image_server
+    good, missing = f"{base_url}/photo.png", f"{base_url}/missing.png"
+
+    images = prefetch_thumbnails([good, missing, None, "not-a-url"], 50, kind="club")
+
+    placeholder = placeholder_image(50, "club")
+    assert images[missing] == placeholder
+    assert images[None] == placeholder
+    assert images["not-a-url"] == placeholder
+    assert Image.open(BytesIO(images[good])).size == (50, 25)
+    # A falha fica memorizada e a URL não é pedida de novo durante FAILURE_TTL_SECONDS
+    assert missing in image_cache._failures
@@ -0,0 +1,48 @@
+"""Solver do onze (best_lineup) comparado com uma pesquisa exaustiva em planteis pequenos"""
+import numpy as np
+import pytest
+
+from lineup import FORMATIONS, ROLE_POSITIONS, best_lineup, slot_penalties
+
+POSITIONS = sorted({position for natural, compatible in ROLE_POSITIONS.values()
+                    for position in natural + compatible})
+
+def brute_force_score(scores, filled):
+    # Melhor soma com exatamente `filled` lugares preenchidos, por programação dinâmica
+    # sobre (lugar, conjunto de jogadores já usados): equivale a testar todas as atribuições
+    n_slots, n_players = scores.shape
+    best = {0: 0.0}
+    for slot in range(n_slots):
+        following = {}
+        for used, total in best.items():
+            # Lugar vazio
+            if following.get(used, -np.inf) < total:
+                following[used] = total
+            for player in range(n_players):
+                if not used & (1 << player):
+                    key = used | (1 << player)
+                    value = total + scores[slot, player]
+                    if following.get(key, -np.inf) < value:
+                        following[key] = value
+        best = following
+    return max(total for used, total in best.items() if bin(used).count('1') == filled)
+
+def lineup_score(slots, scores):
+    return sum(scores[slot, player] for slot, player in enumerate(slots) if player >= 0)
+
+@pytest.mark.parametrize('formation', ["4-3-3", "3-5-2"])
+@pytest.mark.parametrize('squad_size', [6, 11, 12])
+def test_best_lineup_matches_brute_force(formation, squad_size):
+    rng = np.random.default_rng(squad_size)
+    roles = [role for role, _, _ in FORMATIONS[formation]]
+    for _ in range(3):
+        overall = rng.integers(50, 90, squad_size).astype('float64')
+        positions = rng.choice(POSITIONS + ["GK"], squad_size)
+        scores = overall[None, :] - slot_penalties(roles, positions)
+
+        slots = best_lineup(overall, positions, formation)
+
+        chosen = slots[slots >= 0]
+        assert len(chosen) == min(len(roles), squad_size)
+        assert len(set(chosen.tolist())) == len(chosen)
+        assert lineup_score(slots, scores) == pytest.approx(brute_force_score(scores, len(chosen)))
@@ -0,0 +1,43 @@
+"""Recarregamento incremental (LiveDataset.reload) comparado com as tabelas construídas de raiz"""
+import numpy as np
+import pandas as pd
+
+from benchmarks.generate_dataset import generate_players
+from lineup import FORMATIONS, get_all_lineups, solve_all_lineups
+from live_data import LiveDataset, warm_derived_caches
+from utils import _summarize_clubs, get_club_summary, read_players_csv
+
+SUMMARY_COLUMNS = ['squad_size', 'overall_mean', 'overall_median', 'age_mean', 'potential_mean',
+                   'value_total_m', 'xi_overall_mean', 'logo']
+
+def test_reload_matches_a_fresh_build(tmp_path):
+    path = tmp_path / "players.csv"
+    raw = generate_players(3000, invalid_fraction=0)
+    raw.to_csv(path, index=False)
+    live = LiveDataset(str(path))
+    warm_derived_caches(live.current)
+
+    # Uma atualização, duas remoções, uma inserção e uma mudança de clube, em clubes diferentes
+    clubs = raw['Club'].unique()
+    raw.loc[raw.index[raw['Club'] == clubs[0]][0], 'Overall'] = 99
+    raw = raw.drop(raw.index[raw['Club'] == clubs[1]][:2])
+    inserted = raw[raw['Club'] == clubs[2]].iloc[[0]].assign(ID=raw['ID'].max() + 1, Name="Novo")
+    raw = pd.concat([raw, inserted])
+    raw.loc[raw.index[raw['Club'] == clubs[3]][0], 'Club'] = clubs[0]
+    raw.to_csv(path, index=False)
+
+    delta = live.reload()
+    snapshot = live.current
+
+    assert (len(delta.inserted), len(delta.updated), len(delta.deleted)) == (1, 2, 2)
+    assert set(delta.changed_clubs) == set(clubs[:4])
+    pd.testing.assert_frame_equal(
+        get_club_summary(snapshot)[SUMMARY_COLUMNS].sort_index(),
+        _summarize_clubs(read_players_csv(str(path)))[SUMMARY_COLUMNS].sort_index(),
+        check_dtype=False)
+    for formation in FORMATIONS:
+        incremental, fresh = get_all_lineups(snapshot, formation), solve_all_lineups(snapshot, formation)
+        assert incremental.keys() == fresh.keys()
+        for club in fresh:
+            np.testing.assert_array_equal(incremental[club], fresh[club], err_msg=f"{formation} {club}")
+    assert live.reload() is None
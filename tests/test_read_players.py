@@ -0,0 +1,25 @@
+"""Leitura do players.csv com células numéricas mal formatadas (leitura sem tipo e limpeza)"""
+import pytest
+
+from benchmarks.generate_dataset import generate_players
+from similarity import SimilarityIndex
+from utils import PLAYER_SCHEMA, read_players_csv
+
+@pytest.mark.parametrize('chunksize', [None, 200])
+def test_malformed_numbers_become_nan(tmp_path, chunksize):
+    players = generate_players(1000, invalid_fraction=0)
+    players = players.astype({'Pace': object, 'ID': object})
+    players.loc[3, 'Pace'] = '8O'
+    players.loc[5, 'ID'] = 'x1'
+    path = tmp_path / "players.csv"
+    players.to_csv(path, index=False)
+
+    df = read_players_csv(str(path), chunksize=chunksize)
+
+    for column, dtype in PLAYER_SCHEMA.items():
+        if dtype == 'float64' and column in df.columns:
+            assert df[column].dtype.kind in 'iuf', column
+    assert df['Pace'].isna().sum() == 1
+    assert df['ID'].isna().sum() == 1
+    # Os índices derivados do dataset aceitam as falhas
+    SimilarityIndex(df)
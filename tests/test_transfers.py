@@ -0,0 +1,75 @@
+"""Métricas incrementais do sandbox de transferências comparadas com um recálculo completo"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.generate_dataset import generate_players
+from live_data import LiveDataset
+from transfers import TransferSandbox
+from utils import _summarize_clubs
+
+METRICS = ['squad_size', 'overall_mean', 'age_mean', 'potential_mean', 'value_total_m', 'xi_overall_mean']
+
+@pytest.fixture(scope='module')
+def dataset(tmp_path_factory):
+    path = tmp_path_factory.mktemp("transfers") / "players.csv"
+    generate_players(2500, invalid_fraction=0).to_csv(path, index=False)
+    return LiveDataset(str(path)).current
+
+def with_missing_potential(df):
+    # Um quarto dos potenciais em falta, numa versão própria (as caches derivadas são por versão)
+    potential = df['Potential'].to_numpy('float32').copy()
+    potential[::4] = np.nan
+    df = df.assign(Potential=potential)
+    df.attrs['version'] = df.attrs['version'] + "-nan-potential"
+    return df
+
+def recompute(df, sandbox):
+    # Resumo de raiz sobre uma cópia com os clubes reatribuídos
+    clubs = df['Club'].astype(object).to_numpy().copy()
+    for transfer in sandbox.transfers:
+        clubs[transfer.row] = transfer.to_club
+    return _summarize_clubs(df.assign(Club=pd.Categorical(clubs)))
+
+@pytest.mark.parametrize('missing_potential', [False, True])
+def test_club_metrics_match_a_full_recompute(dataset, missing_potential):
+    df = with_missing_potential(dataset) if missing_potential else dataset
+    clubs = df['Club'].cat.categories.tolist()
+    rng = np.random.default_rng(7)
+    sandbox = TransferSandbox(df)
+    while len(sandbox.transfers) < 200:
+        row, club = int(rng.integers(len(df))), clubs[rng.integers(len(clubs))]
+        if sandbox.club_of(row) != club:
+            sandbox.move(row, club)
+        if rng.random() < 0.1:
+            sandbox.undo()
+
+    summary = recompute(df, sandbox)
+    for club in sandbox.changed_clubs():
+        expected = summary.loc[club, METRICS].astype(float) if club in summary.index else None
+        metrics = sandbox.club_metrics(club)
+        if expected is None:
+            assert metrics['squad_size'] == 0
+            continue
+        np.testing.assert_allclose(metrics[METRICS].to_numpy(float), expected.to_numpy(),
+                                   rtol=1e-6, err_msg=club)
+
+    while sandbox.undo():
+        pass
+    assert not sandbox.changed_clubs()
+
+def test_move_without_id_leaves_the_sandbox_unchanged(dataset):
+    df = dataset.assign(ID=dataset['ID'].astype('float32'))
+    df.loc[0, 'ID'] = np.nan
+    df.attrs['version'] = dataset.attrs['version'] + "-missing-id"
+    sandbox = TransferSandbox(df)
+    club = next(club for club in df['Club'].cat.categories if club != df['Club'].iat[0])
+    before = sandbox.club_metrics(club)
+
+    with pytest.raises(ValueError):
+        sandbox.move(0, club)
+
+    assert sandbox.transfers == []
+    assert sandbox.club_of(0) == df['Club'].iat[0]
+    assert not sandbox.changed_clubs()
+    pd.testing.assert_series_equal(sandbox.club_metrics(club), before)
@@ -0,0 +1,229 @@
+"""Simulador de transferências: movimentos hipotéticos por sessão sobre o dataset partilhado
+
+O sandbox não copia o dataset. Guarda só o clube atual dos jogadores movidos e,
+para cada clube afetado, somas correntes (plantel, Overall, Idade, Potencial,
+valor, cada uma com a sua contagem de valores não NaN) e contagens/somas por
+posição, inicializadas a partir do plantel e da matriz de posições. Cada
+movimento atualiza essas somas em O(1); o onze e o Overall do onze só são
+recalculados, quando pedidos, para os clubes que mudaram.
+"""
+from collections import namedtuple
+import numpy as np
+import pandas as pd
+import streamlit as st
+from lineup import DEFAULT_FORMATION, best_lineup, get_starting_xi, lineup_frame
+from position_strength import get_position_strength
+from utils import club_rows, dataset_version, get_club_summary
+
+Transfer = namedtuple('Transfer', ['row', 'player_id', 'name', 'from_club', 'to_club'])
+
+# Colunas somadas por clube: nome da soma -> coluna do dataset
+SUM_COLUMNS = {'overall': 'Overall', 'age': 'Age', 'potential': 'Potential', 'value': 'value_eur_m'}
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def _build_player_arrays(_df, version):
+    # Colunas numéricas usadas pelo sandbox, partilhadas por todas as sessões
+    arrays = {name: _df[column].to_numpy(dtype='float64') for name, column in SUM_COLUMNS.items()}
+    arrays['value'] = np.nan_to_num(arrays['value'])
+    arrays['position'] = _df['position_code'].astype(str).to_numpy()
+    arrays['ids'] = pd.Index(_df['ID'])
+    return arrays
+
+def get_player_arrays(df):
+    """Arrays por jogador (Overall, Idade, Potencial, valor, posição e índice de IDs) do snapshot"""
+    return _build_player_arrays(df, dataset_version(df))
+
+class TransferSandbox:
+    """Transferências hipotéticas aplicadas como camada sobre um snapshot do dataset"""
+
+    def __init__(self, df):
+        self.df = df
+        self.version = dataset_version(df)
+        self.transfers = []
+        self._arrays = get_player_arrays(df)
+        self._summary = get_club_summary(df)
+        self._club_of = {}       # iloc -> clube atual (só jogadores movidos)
+        self._incoming = {}      # clube -> iloc que chegaram
+        self._outgoing = {}      # clube -> iloc que saíram
+        self._totals = {}        # clube -> somas correntes
+        self._counts = {}        # clube -> nº de valores não NaN de cada soma
+        self._positions = {}     # clube -> {posição: [contagem, soma do Overall]}
+        self._xi = {}            # (clube, formação) -> onze recalculado
+
+    def club_of(self, row):
+        """Clube atual do jogador (iloc), com as transferências aplicadas"""
+        return self._club_of.get(row, self.df['Club'].iat[row])
+
+    def changed_clubs(self):
+        """Clubes com o plantel alterado pelas transferências"""
+        return [club for club in self._totals if self._incoming.get(club) or self._outgoing.get(club)]
+
+    def move(self, row, to_club):
+        """Transfere o jogador (iloc) para outro clube; devolve o Transfer registado"""
+        if to_club not in self._summary.index:
+            raise KeyError(f"Clube desconhecido: {to_club}")
+        from_club = self.club_of(row)
+        if from_club == to_club:
+            raise ValueError("O jogador já pertence a esse clube")
+        # O registo é criado antes de alterar as somas: se falhar, o sandbox fica como estava
+        player_id = self.df['ID'].iat[row]
+        if pd.isna(player_id):
+            raise ValueError("Jogador sem ID: a transferência não pode ser registada")
+        transfer = Transfer(row, int(player_id), str(self.df['Name'].iat[row]), from_club, to_club)
+        self._apply(row, from_club, to_club)
+        self.transfers.append(transfer)
+        return transfer
+
+    def undo(self):
+        """Anula a última transferência; devolve-a (None se não houver)"""
+        if not self.transfers:
+            return None
+        transfer = self.transfers.pop()
+        self._apply(transfer.row, transfer.to_club, transfer.from_club)
+        return transfer
+
+    def rebase(self, df):
+        """Novo sandbox sobre outro snapshot, repetindo as transferências pelo ID dos jogadores
+
+        Devolve (sandbox, transferências que deixaram de ser possíveis).
+        """
+        sandbox = TransferSandbox(df)
+        ids = sandbox._arrays['ids']
+        skipped = []
+        for transfer in self.transfers:
+            row = ids.get_indexer([transfer.player_id])[0]
+            try:
+                if row < 0:
+                    raise KeyError(transfer.player_id)
+                sandbox.move(int(row), transfer.to_club)
+            except (KeyError, ValueError):
+                skipped.append(transfer)
+        return sandbox, skipped
+
+    def _ensure_club(self, club):
+        # Somas iniciais do clube a partir do plantel (sem os NaN) e da matriz de posições
+        if club in self._totals:
+            return
+        rows = club_rows(self.df, club)
+        self._totals[club] = {'count': len(rows)}
+        self._counts[club] = {}
+        for name in SUM_COLUMNS:
+            values = self._arrays[name][rows]
+            valid = ~np.isnan(values)
+            self._totals[club][name] = values[valid].sum()
+            self._counts[club][name] = int(valid.sum())
+        strength = get_position_strength(self.df)
+        counts, means = strength.count.loc[club], strength.mean.loc[club]
+        self._positions[club] = {position: [counts[position], means[position] * counts[position]]
+                                 for position in counts.index if counts[position] > 0}
+
+    def _apply(self, row, from_club, to_club):
+        # Atualização O(1) das somas dos dois clubes e da camada de pertença
+        self._ensure_club(from_club)
+        self._ensure_club(to_club)
+        position = self._arrays['position'][row]
+        overall = self._arrays['overall'][row]
+        for club, sign in ((from_club, -1), (to_club, 1)):
+            totals, counts = self._totals[club], self._counts[club]
+            totals['count'] += sign
+            for name in SUM_COLUMNS:
+                value = self._arrays[name][row]
+                if not np.isnan(value):
+                    totals[name] += sign * value
+                    counts[name] += sign
+            cell = self._positions[club].setdefault(position, [0, 0.0])
+            cell[0] += sign
+            cell[1] += sign * overall
+            if cell[0] == 0:
+                del self._positions[club][position]
+            for key in [key for key in self._xi if key[0] == club]:
+                del self._xi[key]
+
+        incoming, outgoing = self._incoming.setdefault(from_club, set()), self._outgoing.setdefault(from_club, set())
+        if row in incoming:
+            incoming.discard(row)
+        else:
+            outgoing.add(row)
+        incoming, outgoing = self._incoming.setdefault(to_club, set()), self._outgoing.setdefault(to_club, set())
+        if row in outgoing:
+            outgoing.discard(row)
+            self._club_of.pop(row, None)
+        else:
+            incoming.add(row)
+            self._club_of[row] = to_club
+
+    def members(self, club):
+        """Posições (iloc) dos jogadores atuais do clube"""
+        rows = club_rows(self.df, club)
+        outgoing = self._outgoing.get(club)
+        if outgoing:
+            rows = rows[~np.isin(rows, list(outgoing))]
+        incoming = self._incoming.get(club)
+        if incoming:
+            rows = np.concatenate([rows, sorted(incoming)])
+        return rows
+
+    def club_metrics(self, club):
+        """Métricas do clube (como no resumo por clube) com as transferências aplicadas"""
+        if club not in self._totals:
+            return self._summary.loc[club, ['squad_size', 'overall_mean', 'age_mean', 'potential_mean',
+                                            'value_total_m', 'xi_overall_mean']].astype(float)
+        totals, counts = self._totals[club], self._counts[club]
+        overall = self._arrays['overall'][self.members(club)]
+        # Overall do onze: os 11 melhores do plantel atual (só para clubes alterados)
+        best = -np.sort(-overall)[:11]
+
+        def mean(name):
+            return totals[name] / counts[name] if counts[name] else np.nan
+
+        return pd.Series({
+            'squad_size': float(totals['count']),
+            'overall_mean': mean('overall'),
+            'age_mean': mean('age'),
+            'potential_mean': mean('potential'),
+            'value_total_m': totals['value'],
+            'xi_overall_mean': best.mean() if len(best) else np.nan,
+        })
+
+    def position_strength(self, club):
+        """Overall médio e nº de jogadores por posição do clube, com as transferências aplicadas"""
+        if club not in self._positions:
+            strength = get_position_strength(self.df)
+            counts = strength.count.loc[club]
+            return pd.DataFrame({'mean': strength.mean.loc[club], 'count': counts})[counts > 0]
+        cells = self._positions[club]
+        positions = sorted(cells)
+        return pd.DataFrame({
+            'mean': [cells[position][1] / cells[position][0] for position in positions],
+            'count': [cells[position][0] for position in positions],
+        }, index=pd.Index(positions, name='position_code'))
+
+    def starting_xi(self, club, formation=DEFAULT_FORMATION):
+        """Onze do clube na formação; recalculado só para os clubes alterados"""
+        if club not in self._totals:
+            return get_starting_xi(self.df, club, formation)
+        key = (club, formation)
+        if key not in self._xi:
+            rows = self.members(club)
+            slots = best_lineup(self._arrays['overall'][rows], self._arrays['position'][rows], formation)
+            self._xi[key] = np.where(slots >= 0, rows[np.maximum(slots, 0)], -1)
+        xi = lineup_frame(self.df, self._xi[key], formation)
+        return xi.assign(Club=club)
+
+def get_transfer_sandbox(df):
+    """Sandbox de transferências da sessão, refeito sobre o snapshot atual se o dataset mudou
+
+    Devolve (sandbox, transferências que não puderam ser repetidas no novo snapshot).
+    """
+    sandbox = st.session_state.get('transfer_sandbox')
+    skipped = []
+    if sandbox is None:
+        sandbox = TransferSandbox(df)
+    elif sandbox.version != dataset_version(df):
+        sandbox, skipped = sandbox.rebase(df)
+    st.session_state.transfer_sandbox = sandbox
+    return sandbox, skipped
+
+def reset_transfer_sandbox():
+    """Descarta todas as transferências da sessão"""
+    st.session_state.pop('transfer_sandbox', None)
@@ -1,93 +1,341 @@
+import os
+from collections import namedtuple
+import numpy as np
 import pandas as pd
 import streamlit as st
-import requests
-from PIL import Image
-from io import BytesIO
-import plotly.graph_objects as go
+from data_cache import load_cached_dataset
+from image_cache import prefetch_thumbnails
+from instrumentation import timed
 
-@st.cache_data
+# plotly é importado dentro das funções que desenham gráficos,
+# para não pesar no arranque da app (ver benchmarks/import_time.py)
+
+# Copy-on-write: objetos derivados do dataset partilhado (fatias, colunas) nunca escrevem nele
+pd.set_option("mode.copy_on_write", True)
+
+DATA_PATH = "data/players.csv"
+
+# Lista de possíveis colunas de estatísticas no dataset FIFA
+STAT_COLUMNS = ['Pace', 'Shooting', 'Passing', 'Dribbling', 'Defending', 'Physical']
+
+# Esquema do CSV de jogadores: só estas colunas são lidas, já com o tipo final.
+# Os números são lidos como float (aceitam células vazias) e reduzidos na limpeza
+# (int8/int16 sem falhas, float32 com falhas); os textos repetidos são categóricos
+# (cada valor guardado uma vez) e os únicos por jogador (nome, foto) são strings
+# pyarrow, guardadas num buffer contíguo em vez de um objeto Python por linha.
+PLAYER_SCHEMA = {
+    'ID': 'float64',
+    'Name': 'string[pyarrow]',
+    'Age': 'float64',
+    'Photo': 'string[pyarrow]',
+    'Nationality': 'category',
+    'Overall': 'float64',
+    'Potential': 'float64',
+    'Club': 'category',
+    'Club Logo': 'category',
+    'Value': 'category',
+    'Wage': 'category',
+    'Preferred Foot': 'category',
+    'Position': 'category',
+    'International Reputation': 'float64',
+    **{column: 'float64' for column in STAT_COLUMNS},
+}
+
+# A partir deste tamanho o CSV é lido e limpo por blocos de linhas (memória limitada)
+CHUNKED_READ_BYTES = 256 * 1024 * 1024
+READ_CHUNK_ROWS = 100_000
+
+@st.cache_resource
+def _load_shared_data():
+    # Dataset lido uma vez por processo; nunca é entregue diretamente a quem o usa
+    return load_cached_dataset(DATA_PATH, read_players_csv)
+
+@timed()
 def load_data():
-    df = pd.read_csv("data/players.csv")
-    return filter_valid_players(df)
+    """Dataset partilhado por todas as sessões, como cópia superficial própria de quem o pede
+
+    Com copy-on-write a cópia não duplica os dados: escrever, acrescentar colunas ou
+    ordenar in-place altera só a cópia, nunca o que as outras sessões estão a ver.
+    """
+    return _load_shared_data().copy(deep=False)
+
+def _csv_options(strict=True):
+    # Colunas fora do esquema são ignoradas e as do esquema em falta não dão erro.
+    # Sem strict, os números mal formatados são lidos sem tipo e convertidos na limpeza.
+    dtype = PLAYER_SCHEMA if strict else {column: dtype for column, dtype in PLAYER_SCHEMA.items()
+                                          if dtype != 'float64'}
+    return dict(usecols=lambda column: column in PLAYER_SCHEMA, dtype=dtype)
+
+def _read_csv(path):
+    try:
+        return pd.read_csv(path, **_csv_options())
+    except ValueError:
+        return pd.read_csv(path, **_csv_options(strict=False))
+
+def _read_clean_chunks(path, chunksize, strict=True):
+    with pd.read_csv(path, chunksize=chunksize, **_csv_options(strict)) as reader:
+        return [filter_valid_players(chunk) for chunk in reader]
+
+def read_players_csv(path, chunksize=None):
+    """Lê e limpa o CSV de jogadores (sem cache)
+
+    Com chunksize (ou automaticamente para ficheiros grandes) o CSV é lido por
+    blocos de linhas e cada bloco é limpo logo a seguir à leitura.
+    """
+    if chunksize is None and os.path.getsize(path) >= CHUNKED_READ_BYTES:
+        chunksize = READ_CHUNK_ROWS
+    if not chunksize:
+        return filter_valid_players(_read_csv(path))
+    try:
+        chunks = _read_clean_chunks(path, chunksize)
+    except ValueError:
+        chunks = _read_clean_chunks(path, chunksize, strict=False)
+    return concat_player_chunks(chunks)
+
+def concat_player_chunks(chunks):
+    """Junta blocos já limpos, unificando as categorias para as colunas continuarem categóricas"""
+    if not chunks:
+        return filter_valid_players(pd.DataFrame({column: pd.Series(dtype=dtype)
+                                                  for column, dtype in PLAYER_SCHEMA.items()}))
+    for column, dtype in chunks[0].dtypes.items():
+        if isinstance(dtype, pd.CategoricalDtype):
+            categories = chunks[0][column].cat.categories
+            for chunk in chunks[1:]:
+                categories = categories.union(chunk[column].cat.categories)
+            for chunk in chunks:
+                chunk[column] = chunk[column].cat.set_categories(categories)
+    return compact_players(pd.concat(chunks, ignore_index=True))
+
+def dataset_version(df):
+    """Versão do dataset carregado, usada como chave das caches derivadas"""
+    return df.attrs.get('version', '')
+
+# Alterações de um snapshot em relação ao anterior (recarregamento incremental, ver live_data):
+# row_map leva cada posição (iloc) antiga à nova (-1 se o jogador foi removido)
+DatasetDelta = namedtuple('DatasetDelta', ['previous', 'row_map', 'inserted', 'updated', 'deleted',
+                                           'changed_clubs'])
+
+_dataset_deltas = {}
+
+def register_delta(df, delta):
+    """Associa ao snapshot o delta em relação ao anterior (só o último é guardado; None se não há delta)"""
+    _dataset_deltas.clear()
+    if delta is not None:
+        _dataset_deltas[dataset_version(df)] = delta
+
+def dataset_delta(df):
+    """Delta do snapshot em relação ao anterior, ou None se foi carregado de raiz"""
+    return _dataset_deltas.get(dataset_version(df))
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _build_club_versions(_df, version):
+    # Versão de cada clube: a do snapshot em que o plantel mudou pela última vez
+    clubs = _df['Club'].cat.categories
+    delta = dataset_delta(_df)
+    if delta is None:
+        return dict.fromkeys(clubs, version)
+    previous = _build_club_versions(delta.previous, dataset_version(delta.previous))
+    return {club: version if club in delta.changed_clubs else previous.get(club, version) for club in clubs}
+
+def club_version(df, club):
+    """Versão do plantel de um clube, chave das caches por clube (não muda se o clube não foi alterado)"""
+    return _build_club_versions(df, dataset_version(df)).get(club, dataset_version(df))
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _build_club_index(_df, version):
+    # Posições (iloc) das linhas de cada clube, calculadas uma vez por versão do dataset
+    return _df.groupby('Club', sort=False, observed=True).indices
+
+def club_rows(df, club):
+    """Posições (iloc) das linhas de um clube pelo índice por clube; array vazio se o clube não existir"""
+    rows = _build_club_index(df, dataset_version(df)).get(club)
+    return rows if rows is not None else np.empty(0, dtype='int64')
+
+def get_club_players(df, club):
+    """Devolve o plantel de um clube usando o índice por clube (sem percorrer o dataset)"""
+    return df.iloc[club_rows(df, club)]
+
+def _fill_missing(series, value):
+    # fillna que também funciona em colunas categóricas sem essa categoria
+    if isinstance(series.dtype, pd.CategoricalDtype) and value not in series.cat.categories:
+        series = series.cat.add_categories([value])
+    return series.fillna(value)
+
+def _smallest_integer_dtype(values):
+    if len(values) == 0:
+        return 'int8'
+    low, high = values.min(), values.max()
+    for dtype in ('int8', 'int16', 'int32'):
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return dtype
+    return 'int64'
+
+def compact_players(df):
+    """Reduz o dataset limpo ao tipo mais compacto de cada coluna
+
+    Números do esquema sem falhas nem decimais passam ao inteiro mais pequeno
+    (ratings em int8), os restantes a float32; as categorias sem jogadores são removidas.
+    """
+    for column, dtype in PLAYER_SCHEMA.items():
+        if dtype != 'float64' or column not in df.columns:
+            continue
+        values = df[column].to_numpy()
+        if values.dtype.kind == 'f':
+            if np.isnan(values).any() or not (values == np.floor(values)).all():
+                df[column] = values.astype('float32')
+                continue
+        elif values.dtype.kind not in 'iu':
+            continue
+        df[column] = values.astype(_smallest_integer_dtype(values))
+    for column, dtype in df.dtypes.items():
+        if isinstance(dtype, pd.CategoricalDtype):
+            df[column] = df[column].cat.remove_unused_categories()
+    return df
+
+def memory_report(df, baseline=None):
+    """Memória ocupada por coluna (bytes, incluindo o conteúdo das strings)
+
+    Com baseline (o mesmo dataset noutra representação) devolve as colunas
+    before/after/ratio e uma linha final com o total.
+    """
+    after = df.memory_usage(deep=True, index=False)
+    if baseline is None:
+        report = after.rename('bytes').to_frame()
+        report.loc['total'] = report['bytes'].sum()
+        return report
+    report = pd.DataFrame({
+        'before': baseline.memory_usage(deep=True, index=False).reindex(after.index),
+        'after': after,
+    })
+    report.loc['total'] = report.sum()
+    report['ratio'] = report['after'] / report['before']
+    return report
 
 def filter_valid_players(df):
     """Filtra e limpa os dados dos jogadores"""
-    # Remove jogadores sem dados essenciais
-    df = df.dropna(subset=['Name', 'Club'])
-    df = df[df['Overall'] > 0]
-    
-    # Converte tipos de dados
-    df['Age'] = pd.to_numeric(df['Age'], errors='coerce')
-    df['Overall'] = pd.to_numeric(df['Overall'], errors='coerce')
-    df['Potential'] = pd.to_numeric(df['Potential'], errors='coerce')
+    # Converte tipos de dados (sem custo se o esquema já os leu como números)
+    age = pd.to_numeric(df['Age'], errors='coerce')
+    overall = pd.to_numeric(df['Overall'], errors='coerce')
     
-    # Remove linhas com dados inválidos após conversão
-    df = df.dropna(subset=['Age', 'Overall'])
+    # Remove jogadores sem dados essenciais ou com dados inválidos, numa só seleção
+    valid = (df['Name'].notna() & df['Club'].notna() & (overall > 0) & age.notna()).to_numpy()
+    if not valid.all():
+        # take devolve uma cópia independente (sem o aviso de escrita numa fatia)
+        rows = np.flatnonzero(valid)
+        df, age, overall = df.take(rows), age.take(rows), overall.take(rows)
+    df['Age'] = age
+    df['Overall'] = overall
+    # Restantes números do esquema (lidos sem tipo quando o CSV tem células mal formatadas)
+    for column, dtype in PLAYER_SCHEMA.items():
+        if dtype == 'float64' and column in df.columns and column not in ('Age', 'Overall'):
+            df[column] = pd.to_numeric(df[column], errors='coerce')
     
     # Garante que Value não seja NaN
-    df['Value'] = df['Value'].fillna('€0M')
+    df['Value'] = _fill_missing(df['Value'], '€0M')
+    
+    # Valores monetários numéricos (calculados uma única vez)
+    df['value_eur_m'] = parse_currency(df['Value'], unit=1e6)
+    if 'Wage' in df.columns:
+        df['wage_eur_k'] = parse_currency(df['Wage'], unit=1e3)
+    else:
+        df['wage_eur_k'] = 0.0
     
     # Garante que Position não seja NaN
-    df['Position'] = df['Position'].fillna('<span class="pos">N/A</span>')
+    df['Position'] = _fill_missing(df['Position'], '<span class="pos">N/A</span>')
     
-    return df
+    # Código da posição extraído do HTML uma única vez
+    df['position_code'] = extract_positions(df['Position'])
+    
+    return compact_players(df)
+
+def _summarize_clubs(df):
+    # Linhas do resumo (sem ordenação) para os clubes presentes em df
+    grouped = df.groupby('Club', sort=False, observed=True)
+    starting_xi = df.sort_values('Overall', ascending=False, kind='stable').groupby(
+        'Club', sort=False, observed=True).head(11)
+    summary = pd.DataFrame({
+        'squad_size': grouped.size(),
+        'overall_mean': grouped['Overall'].mean(),
+        'overall_median': grouped['Overall'].median(),
+        'age_mean': grouped['Age'].mean(),
+        'potential_mean': grouped['Potential'].mean(),
+        'value_total_m': grouped['value_eur_m'].sum(),
+        'xi_overall_mean': starting_xi.groupby('Club', sort=False, observed=True)['Overall'].mean(),
+        'logo': grouped['Club Logo'].first().astype(object),
+    })
+    summary.index = summary.index.astype(object)
+    return summary
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _build_club_summary(_df, version):
+    # Resumo de todos os clubes, calculado uma vez por versão do dataset e partilhado entre sessões;
+    # após um recarregamento incremental só os clubes alterados são recalculados
+    delta = dataset_delta(_df)
+    if delta is None:
+        summary = _summarize_clubs(_df)
+    else:
+        changed = list(delta.changed_clubs)
+        previous = get_club_summary(delta.previous).drop(index=changed, columns='label', errors='ignore')
+        summary = pd.concat([previous, _summarize_clubs(_df[_df['Club'].isin(changed).to_numpy()])])
+    summary = summary.sort_values('overall_mean', ascending=False)
+    summary['label'] = summary.index + " (Overall: " + summary['overall_mean'].map('{:.1f}'.format) + ")"
+    return summary
+
+def get_club_summary(df):
+    """Tabela resumo por clube (plantel, médias, valor total, logo), ordenada por Overall médio
+
+    Cada chamada recebe uma cópia superficial do resumo em cache (ver load_data).
+    """
+    return _build_club_summary(df, dataset_version(df)).copy(deep=False)
 
 def get_club_logo(df, club):
+    """URL do logo do clube, ou None se não existir (a interface usa uma imagem local de substituição)"""
     try:
-        logo_url = df[df['Club'] == club]['Club Logo'].iloc[0]
+        logo_url = get_club_summary(df).at[club, 'logo']
         if pd.notna(logo_url) and logo_url.startswith('http'):
             return logo_url
         else:
-            return "https://via.placeholder.com/120x120/2a5298/white?text=FC"
+            return None
     except:
-        return "https://via.placeholder.com/120x120/2a5298/white?text=FC"
+        return None
 
-def convert_value_to_float(value_str):
-    """Converte valores monetários para float (€91M, €575K, etc.)"""
-    try:
-        if pd.isna(value_str):
-            return 0.0
-        
-        # Remove € e espaços
-        clean_value = str(value_str).replace('€', '').strip()
-        
-        if 'M' in clean_value:
-            # Milhões
-            return float(clean_value.replace('M', ''))
-        elif 'K' in clean_value:
-            # Milhares - converte para milhões
-            return float(clean_value.replace('K', '')) / 1000
-        else:
-            # Tenta converter diretamente
-            try:
-                return float(clean_value)
-            except:
-                return 0.0
-    except:
-        return 0.0
+def parse_currency(values, unit=1e6):
+    """Converte uma série de valores monetários (€91M, €575K, 1.5) para float, de forma vetorizada
 
-def extract_position(position_html):
-    try:
-        import re
-        if pd.isna(position_html):
-            return "N/A"
-        match = re.search(r'>([A-Z]+)<', str(position_html))
-        return match.group(1) if match else "N/A"
-    except:
-        return "N/A"
+    Os valores sem sufixo são interpretados como estando já na unidade pedida.
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        # Converte só os valores distintos e propaga pelos códigos (-1, em falta, fica 0)
+        parsed = parse_currency(pd.Series(values.cat.categories, dtype=object), unit).to_numpy()
+        return pd.Series(np.append(parsed, 0.0)[values.cat.codes.to_numpy()], index=values.index)
+    clean = values.astype(str).str.replace('€', '', regex=False).str.strip().str.upper()
+    suffix = clean.str[-1:]
+    multiplier = suffix.map({'M': 1e6 / unit, 'K': 1e3 / unit}).fillna(1.0)
+    number = pd.to_numeric(clean.str.rstrip('MK'), errors='coerce')
+    return (number * multiplier).fillna(0.0).astype('float64')
 
-def create_football_field(df, club, side="left"):
-    """Cria um campo de futebol interativo com jogadores"""
-    players = df[df["Club"] == club].nlargest(11, 'Overall')
-    
-    # Formação 4-3-3
-    positions = [
-        (50, 5),   # GK
-        (20, 25), (40, 25), (60, 25), (80, 25),  # Defense
-        (30, 50), (50, 50), (70, 50),  # Midfield  
-        (25, 75), (50, 85), (75, 75)   # Attack
-    ]
-    
+def extract_positions(position_html):
+    """Extrai o código da posição de uma série inteira de HTML (categórica, ordenada)"""
+    if isinstance(position_html.dtype, pd.CategoricalDtype):
+        # Extrai só das categorias distintas e propaga pelos códigos (-1, em falta, fica N/A)
+        per_category = extract_positions(pd.Series(position_html.cat.categories, dtype=object))
+        per_category = np.append(per_category.astype(str).to_numpy(dtype=object), "N/A")
+        categories, inverse = np.unique(per_category, return_inverse=True)
+        codes = inverse[position_html.cat.codes.to_numpy()]
+        return pd.Series(pd.Categorical.from_codes(codes, categories),
+                         index=position_html.index).cat.remove_unused_categories()
+    codes = position_html.astype(str).str.extract(r'>([A-Z]+)<', expand=False).fillna("N/A")
+    return codes.astype(pd.CategoricalDtype(sorted(codes.unique())))
+
+def list_positions(df):
+    """Lista ordenada das posições distintas do dataset"""
+    return df['position_code'].cat.categories.tolist()
+
+@st.cache_resource(show_spinner=False)
+def _build_pitch_base():
+    # Campo estático (linhas, círculo, áreas e eixos), construído uma única vez por processo
+    import plotly.graph_objects as go
     fig = go.Figure()
     
     # Campo base
@@ -119,32 +367,6 @@ def create_football_field(df, club, side="left"):
         line=dict(color="white", width=2), fillcolor="rgba(255,255,255,0.1)"
     )
     
-    # Adicionar jogadores
-    for i, (player, (x, y)) in enumerate(zip(players.itertuples(), positions)):
-        fig.add_trace(go.Scatter(
-            x=[x], y=[y],
-            mode="markers+text",
-            marker=dict(
-                size=30,
-                color="rgba(30, 60, 114, 0.9)",
-                line=dict(color="white", width=3),
-                symbol="circle"
-            ),
-            text=[player.Name.split()[-1][:6]],
-            textposition="bottom center",
-            textfont=dict(color="white", size=10, family="Arial Black"),
-            hovertemplate=f"""
-            <b>{player.Name}</b><br>
-            Overall: {player.Overall}<br>
-            Posição: {extract_position(player.Position)}<br>
-            Idade: {player.Age}<br>
-            Valor: {player.Value}<br>
-            <extra></extra>
-            """,
-            name=f"{player.Name}",
-            customdata=[player.ID] if hasattr(player, 'ID') else [i]
-        ))
-    
     fig.update_layout(
         width=500, height=600,
         margin=dict(l=10, r=10, t=50, b=10),
@@ -152,9 +374,51 @@ def create_football_field(df, club, side="left"):
         yaxis=dict(showgrid=False, zeroline=False, visible=False, range=[0, 90]),
         plot_bgcolor="rgba(34, 139, 34, 0.9)",
         paper_bgcolor="rgba(0,0,0,0)",
-        showlegend=False,
+        showlegend=False
+    )
+    return fig
+
+@st.cache_resource(show_spinner=False, max_entries=256)
+def _build_football_field(_df, club, formation, version):
+    # Figura final memorizada por (clube, formação, versão do plantel do clube)
+    from lineup import get_starting_xi
+    players = get_starting_xi(_df, club, formation)
+    
+    names = players['Name'].astype(str)
+    hover = (
+        "<b>" + names + "</b><br>"
+        + "Overall: " + players['Overall'].astype(str) + "<br>"
+        + "Posição: " + players['position_code'].astype(str) + " (" + players['slot_role'] + ")<br>"
+        + "Idade: " + players['Age'].astype(str) + "<br>"
+        + "Valor: " + players['Value'].astype(str) + "<br>"
+    )
+    ids = players['ID'].tolist() if 'ID' in players.columns else list(range(len(players)))
+    
+    import plotly.graph_objects as go
+    fig = go.Figure(_build_pitch_base())
+    
+    # Todos os jogadores num único trace
+    fig.add_trace(go.Scatter(
+        x=players['slot_x'].tolist(),
+        y=players['slot_y'].tolist(),
+        mode="markers+text",
+        marker=dict(
+            size=30,
+            color="rgba(30, 60, 114, 0.9)",
+            line=dict(color="white", width=3),
+            symbol="circle"
+        ),
+        text=names.str.split().str[-1].str[:6].tolist(),
+        textposition="bottom center",
+        textfont=dict(color="white", size=10, family="Arial Black"),
+        hovertext=hover.tolist(),
+        hovertemplate="%{hovertext}<extra></extra>",
+        customdata=ids
+    ))
+    
+    fig.update_layout(
         title=dict(
-            text=f"{club} - Formação 4-3-3",
+            text=f"{club} - Formação {formation}",
             x=0.5,
             font=dict(color="white", size=16)
         )
@@ -162,15 +426,18 @@ def create_football_field(df, club, side="left"):
     
     return fig
 
+@timed()
+def create_football_field(df, club, side="left", formation="4-3-3"):
+    """Cria um campo de futebol interativo com jogadores (memorizado por clube, formação e versão do clube)"""
+    return _build_football_field(df, club, formation, club_version(df, club))
+
+@timed()
 def create_player_stats_radar(player):
     """Cria gráfico radar APENAS com dados reais do dataset"""
     # Verificar quais colunas de stats existem no dataset
     available_stats = {}
     
-    # Lista de possíveis colunas de estatísticas no dataset FIFA
-    stat_columns = ['Pace', 'Shooting', 'Passing', 'Dribbling', 'Defending', 'Physical']
-    
-    for stat in stat_columns:
+    for stat in STAT_COLUMNS:
         if hasattr(player, stat) and pd.notna(getattr(player, stat)):
             available_stats[stat] = getattr(player, stat)
     
@@ -178,6 +445,7 @@ def create_player_stats_radar(player):
     if not available_stats:
         return None
     
+    import plotly.graph_objects as go
     fig = go.Figure()
     
     fig.add_trace(go.Scatterpolar(
@@ -205,33 +473,14 @@ def create_player_stats_radar(player):
     
     return fig
 
-def load_image_from_url(url, width=100):
-    """Carrega imagem de uma URL"""
-    try:
-        response = requests.get(url, timeout=5)
-        response.raise_for_status()
-        image = Image.open(BytesIO(response.content))
-        return image
-    except:
-        return None
-
-def format_currency(value_str):
-    """Formata valores monetários"""
-    try:
-        if pd.isna(value_str):
-            return "N/A"
-        
-        # Remove símbolos e converte para float
-        clean_value = str(value_str).replace('€', '').replace('M', '').replace('K', '')
-        
-        if 'M' in str(value_str):
-            return f"€{float(clean_value):.1f}M"
-        elif 'K' in str(value_str):
-            return f"€{float(clean_value):.0f}K"
-        else:
-            return str(value_str)
-    except:
-        return "N/A"
+def prefetch_player_photos(players, width, block=True):
+    """Miniaturas das fotos dos jogadores, pela ordem das linhas, obtidas em paralelo"""
+    if 'Photo' in players.columns:
+        urls = [url if isinstance(url, str) else None for url in players['Photo']]
+    else:
+        urls = [None] * len(players)
+    images = prefetch_thumbnails(urls, width, kind="player", block=block)
+    return [images.get(url) for url in urls]
 
 def get_player_rating_color(overall):
     """Retorna cor baseada no rating do jogador"""